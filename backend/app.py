@@ -1,5 +1,6 @@
 import logging
 from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.exceptions import RequestEntityTooLarge
 from flask_cors import CORS
 from backend.config import Config
@@ -7,6 +8,7 @@ from backend.db import init_db
 from backend.routes.api import api_bp
 from backend.routes.auth import auth_bp
 from backend.routes.admin import admin_bp
+from backend.utils import fast_json
 
 logger = logging.getLogger(__name__)
 
@@ -25,8 +27,32 @@ def bootstrap_initial_admin():
         # 不抛出异常,避免影响应用启动
 
 
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    使用 fast_json（优先 orjson）的 Flask JSON 编解码
+
+    jsonify / request.get_json 走这里；调试模式的缩进输出以及 orjson 不支持的类型
+    （如 Decimal）回退到 Flask 默认实现
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        # 非调试模式下 Flask 只传入紧凑分隔符，与 fast_json 的输出一致
+        if kwargs.keys() <= {"separators"}:
+            try:
+                return fast_json.dumps(obj).decode("utf-8")
+            except TypeError:
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return fast_json.loads(s)
+
+
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.config.from_object(Config)
 
     # 仅在开发环境 + SQLite 时自动创建表,生产环境依赖迁移工具
@@ -1,10 +1,11 @@
 import os
-import yaml
 import logging
 from pathlib import Path
 from typing import Optional
 from dotenv import load_dotenv
 
+from backend.utils import fast_yaml
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -17,6 +18,7 @@ class Config:
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173,http://localhost:3000').split(',')
     GOOGLE_CLOUD_API_KEY = os.getenv('GOOGLE_CLOUD_API_KEY')
     OUTPUT_DIR = os.getenv('OUTPUT_DIR', 'output')
+    DATA_DIR = os.getenv('DATA_DIR', 'data')
 
     # Flask 请求体大小限制（50MB，用于支持大图片上传）
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50 MB
@@ -24,6 +26,12 @@ class Config:
     # 数据库配置（默认使用 SQLite，支持 MySQL）
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///redink.db')
 
+    # 数据库连接池配置（SQLite 不使用）
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))  # 获取连接的等待超时（秒）
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # 连接最长复用时间（秒）
+
     # Redis 连接配置
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 
@@ -35,6 +43,10 @@ class Config:
     OUTLINE_TASK_TIMEOUT = int(os.getenv('OUTLINE_TASK_TIMEOUT', 300))  # 大纲生成超时 5 分钟
     IMAGE_TASK_TIMEOUT = int(os.getenv('IMAGE_TASK_TIMEOUT', 1800))  # 图片生成超时 30 分钟
 
+    # SSE 配置
+    SSE_KEEPALIVE_INTERVAL = int(os.getenv('SSE_KEEPALIVE_INTERVAL', 15))  # 无事件时发送心跳的间隔（秒）
+    SSE_MAX_CONNECTIONS_PER_USER = int(os.getenv('SSE_MAX_CONNECTIONS_PER_USER', 5))  # 每个用户的并发 SSE 连接上限，0 表示不限制
+
     # Worker 并发配置
     WORKER_CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', 8))  # 并发 Worker 进程数
 
@@ -89,7 +101,7 @@ class Config:
             return cls._image_providers_config
 
         with open(config_path, 'r', encoding='utf-8') as f:
-            cls._image_providers_config = yaml.safe_load(f)
+            cls._image_providers_config = fast_yaml.safe_load(f)
 
         return cls._image_providers_config
 
@@ -11,20 +11,49 @@ import sqlalchemy as sa
 from sqlalchemy.orm import declarative_base, sessionmaker, scoped_session, Session
 
 from backend.config import Config
+from backend.utils import fast_json
 
 logger = logging.getLogger(__name__)
 
+# 建表时使用的 PostgreSQL advisory lock 键（任意固定值）
+INIT_DB_LOCK_KEY = 0x0DB1417
+
 # 声明基类
 Base = declarative_base()
 
+# 连接池参数（SQLite 为本地文件，沿用 SQLAlchemy 默认连接池）
+_pool_options = {}
+if sa.engine.make_url(Config.DATABASE_URL).get_backend_name() != "sqlite":
+    _pool_options = {
+        "pool_size": Config.DB_POOL_SIZE,
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "pool_timeout": Config.DB_POOL_TIMEOUT,
+        "pool_recycle": Config.DB_POOL_RECYCLE,
+        # LIFO：优先复用最近归还的连接，空闲的溢出连接可以及时回收
+        "pool_use_lifo": True,
+    }
+
 # 创建引擎
 engine = sa.create_engine(
     Config.DATABASE_URL,
     future=True,
     pool_pre_ping=True,  # 自动检测断开的连接
     echo=Config.DEBUG,  # 开发环境打印 SQL
+    # JSON 列的序列化/反序列化（优先 orjson）
+    json_serializer=lambda obj: fast_json.dumps(obj).decode("utf-8"),
+    json_deserializer=fast_json.loads,
+    **_pool_options,
 )
 
+if engine.dialect.name == "sqlite":
+    @sa.event.listens_for(engine, "connect")
+    def _enable_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:
+        """SQLite 默认不执行外键约束，开启后 ON DELETE CASCADE / SET NULL 才会生效"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
 # 创建会话工厂
 SessionLocal = scoped_session(
     sessionmaker(
@@ -46,10 +75,97 @@ def init_db() -> None:
     from backend import models  # noqa: F401
 
     logger.info(f"正在初始化数据库: {Config.DATABASE_URL}")
-    Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as conn:
+        # PostgreSQL：多个进程同时启动时用事务级 advisory lock 串行化建表
+        if conn.dialect.name == "postgresql":
+            conn.execute(sa.text("SELECT pg_advisory_xact_lock(:key)"), {"key": INIT_DB_LOCK_KEY})
+            # 模糊搜索使用的 trigram GIN 索引依赖 pg_trgm 扩展，不可用时跳过这些索引
+            conn.info["available_extensions"] = (
+                {"pg_trgm"} if _ensure_pg_extension(conn, "pg_trgm") else set()
+            )
+
+        try:
+            Base.metadata.create_all(bind=conn, checkfirst=True)
+            _create_missing_indexes(conn)
+        except (sa.exc.OperationalError, sa.exc.ProgrammingError) as e:
+            # 其他进程已抢先建表（checkfirst 与 CREATE 之间的竞争窗口），可安全忽略
+            if "already exists" not in str(e).lower():
+                raise
+            conn.rollback()
+            logger.info("数据库表已由其他进程创建，跳过")
+        else:
+            conn.commit()
+
     logger.info("数据库初始化完成")
 
 
+def _ensure_pg_extension(conn: sa.Connection, name: str) -> bool:
+    """
+    确保 PostgreSQL 扩展已安装
+
+    托管数据库的账号通常没有 CREATE 权限，建扩展失败时只回滚到保存点并记录警告，不影响启动
+
+    Args:
+        conn: 数据库连接（PostgreSQL）
+        name: 扩展名
+
+    Returns:
+        bool: 扩展是否可用
+    """
+    installed = conn.execute(
+        sa.text("SELECT 1 FROM pg_extension WHERE extname = :name"), {"name": name}
+    ).first()
+    if installed:
+        return True
+
+    try:
+        with conn.begin_nested():
+            conn.execute(sa.text(f'CREATE EXTENSION IF NOT EXISTS "{name}"'))
+    except sa.exc.DBAPIError as e:
+        logger.warning(f"无法创建 PostgreSQL 扩展 {name}，将跳过依赖它的索引: {e}")
+        return False
+    return True
+
+
+def _existing_index_names(conn: sa.Connection, inspector, table_name: str) -> set:
+    """获取表上已有的索引名"""
+    # SQLite 反射会跳过表达式索引（并告警），直接从 sqlite_master 读取
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?",
+            (table_name,),
+        )
+        return {row[0] for row in rows}
+    return {index["name"] for index in inspector.get_indexes(table_name)}
+
+
+def _create_missing_indexes(conn: sa.Connection) -> None:
+    """
+    为已存在的表补建模型中新增的索引
+
+    create_all 只会为新建的表创建索引，已有部署需要在这里补齐。
+    """
+    inspector = sa.inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = _existing_index_names(conn, inspector, table.name)
+        for index in table.indexes:
+            # 跳过仅适用于其他数据库的索引（如 PostgreSQL trigram 索引）
+            index_dialect = index.info.get("dialect")
+            if index_dialect and index_dialect != conn.dialect.name:
+                continue
+            # 跳过依赖未安装扩展的索引
+            index_extension = index.info.get("extension")
+            if index_extension and index_extension not in conn.info.get("available_extensions", ()):
+                continue
+            if index.name not in existing_indexes:
+                logger.info(f"正在创建索引: {table.name}.{index.name}")
+                index.create(bind=conn)
+
+
 def get_db() -> Session:
     """
     获取数据库会话（用于依赖注入）
@@ -1,14 +1,31 @@
 """OpenAI 兼容接口图片生成器"""
+import atexit
+import json
+import os
 import time
 import random
-import base64
+import threading
+import binascii
+try:
+    import pybase64 as base64
+except ImportError:  # pybase64 为可选依赖，接口与标准库一致
+    import base64
+import hashlib
 import re
 import logging
+from collections import OrderedDict
 from functools import wraps
-from typing import Dict, Any, List, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
+from pathlib import Path
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import ClassVar, Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, wait
 import requests
+from requests.adapters import HTTPAdapter
 from .base import ImageGeneratorBase
+from ..utils import fast_json
 from ..utils.image_compressor import compress_image
 
 # 配置日志
@@ -19,11 +36,181 @@ logger = logging.getLogger(__name__)
 DEFAULT_IMAGE_INDEX = 0
 DEFAULT_REQUEST_TIMEOUT = 180
 DEFAULT_DOWNLOAD_TIMEOUT = 60
+# 生成结果缓存默认配置
+DEFAULT_IMAGE_CACHE_DIR = ".image_cache"
+DEFAULT_IMAGE_CACHE_TTL = 24 * 60 * 60  # 1 天
+DEFAULT_IMAGE_CACHE_MEMORY_ITEMS = 64
+# 清理过期磁盘缓存文件的最小间隔（秒），写入时触发
+IMAGE_CACHE_PRUNE_INTERVAL = 10 * 60
+# 重试等待时间上限（秒）
+MAX_RETRY_DELAY = 60
+# 候选图片下载线程池大小（进程内共享）
+DOWNLOAD_POOL_MAX_WORKERS = 16
+# 单个图片域名的最大并发下载数，避免对图床/CDN 造成突发压力
+DOWNLOAD_PER_HOST_CONCURRENCY = 4
+# API 请求连接池配置
+API_POOL_CONNECTIONS = 16
+API_POOL_MAXSIZE = 32
 # Markdown 图片链接正则：支持括号内的前后空格
 # 匹配格式：![alt]( url ) 或 ![alt](url)
 # 使用非贪婪匹配 .*? 来捕获括号内的所有内容，然后在提取时再去除空格
 MARKDOWN_IMAGE_PATTERN = r'!\[[^\]]*\]\(\s*(.+?)\s*\)'
 SENSITIVE_ERROR_KEYWORD = "sensitive_words_detected"
+_MARKDOWN_IMAGE_RE = re.compile(MARKDOWN_IMAGE_PATTERN)
+_HTTP_URL_RE = re.compile(r'https?://')
+_IMAGE_URL_RE = re.compile(r'https?://.*\.(png|jpg|jpeg|gif|webp)', re.IGNORECASE)
+# 从服务端提示中解析字符上限，例如："不能超过 1600 个字符"
+_CHAR_LIMIT_RE = re.compile(r"(\d+)\s*个?字符")
+# API 错误消息正则模式
+_API_ERROR_PATTERNS = (
+    # 字符/长度限制相关
+    r"不能超过\s*\d+\s*个字符",
+    r"超过.*字符限制",
+    r"prompt.*too long",
+    r"exceeds.*limit",
+    r"maximum.*length",
+    # 内容审核相关
+    r"违反.*政策",
+)
+# API 错误消息纯文本关键字
+_API_ERROR_KEYWORDS = (
+    # 内容审核相关
+    "内容违规",
+    "content policy",
+    # 配额/限制相关
+    "配额不足",
+    "quota exceeded",
+    "rate limit",
+    # 参数错误相关
+    "参数错误",
+    "invalid parameter",
+    "参数无效",
+)
+# 正则模式与关键字（re.escape 后）合并为单个预编译模式，一次扫描完成（大小写不敏感）
+_API_ERROR_RE = re.compile(
+    "|".join(
+        [re.escape(keyword) for keyword in _API_ERROR_KEYWORDS] +
+        [f"(?:{pattern})" for pattern in _API_ERROR_PATTERNS]
+    ),
+    re.IGNORECASE
+)
+# images API 响应中的 b64_json 字段（在原始 bytes 上匹配）
+_B64_JSON_RE = re.compile(rb'"b64_json"\s*:\s*"([^"]+)"')
+# chat API 响应中 content 直接为 base64 data URL 的情况（在原始 bytes 上匹配）
+_CHAT_DATA_URL_CONTENT_RE = re.compile(rb'"content"\s*:\s*"(data:image/[^"]+)"')
+# 支持的图片 URL 前缀（base64 data URL 或 HTTP(S) URL）
+_SUPPORTED_IMAGE_URL_RE = re.compile(r"data:image|https?://", re.IGNORECASE)
+# 提示词长度超限错误检测：关键字与正则合并为单个预编译模式，一次扫描完成
+_LENGTH_ERROR_RE = re.compile(
+    r"不能超过|不得超过|超出最大长度|too long"
+    r"|超过.*字符|exceeds.*maximum.*length|maximum.*length.*exceeded",
+    re.IGNORECASE
+)
+
+
+# Markdown 代码块结束标记：整行仅包含 ```（允许前后空白）
+_CODE_FENCE_CLOSE_RE = re.compile(r"^[^\S\n]*```[^\S\n]*$", re.M)
+
+
+def _strip_markdown_code_block(text: str) -> str:
+    """
+    移除 Markdown 代码块标记
+
+    Args:
+        text: 可能包含代码块标记的文本
+
+    Returns:
+        清理后的文本
+    """
+    text = text.strip()
+    if not text.startswith("```"):
+        return text
+
+    first_newline = text.find("\n")
+    if first_newline < 0:
+        return text
+
+    # 去掉首行的 ``` 和结束的 ```（结束标记行去除空白后只能是 ```）
+    match = _CODE_FENCE_CLOSE_RE.search(text, first_newline + 1)
+    if match is None:
+        return text[first_newline + 1:].strip()
+    return text[first_newline + 1:match.start()].strip()
+
+
+def _analyze_chat_content(content: str) -> Tuple[str, bool, bool]:
+    """
+    对 chat 响应内容进行一次性清理与错误分类
+
+    同一响应会先后经过长度错误检查和通用错误检测，由调用方计算一次后传给两者。
+
+    Args:
+        content: API 返回的原始内容
+
+    Returns:
+        (清理后的文本, 是否为长度超限错误, 是否匹配通用错误模式)
+    """
+    cleaned = _strip_markdown_code_block(content)
+    has_length_error = _LENGTH_ERROR_RE.search(cleaned) is not None
+    has_api_error = _API_ERROR_RE.search(cleaned) is not None
+    return cleaned, has_length_error, has_api_error
+
+
+class RateLimitError(Exception):
+    """API 返回 429 速率限制错误，携带服务端建议的重试等待时间"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头（支持秒数和 HTTP 日期两种格式）
+
+    Args:
+        value: Retry-After 头的原始值
+
+    Returns:
+        需要等待的秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _raise_for_api_status(response, preview_limit: Optional[int] = None) -> None:
+    """
+    检查 API 响应状态码，非 200 时抛出异常
+
+    Args:
+        response: requests 的 Response 对象
+        preview_limit: 错误信息中响应体的最大预览长度（None 表示不截断）
+
+    Raises:
+        RateLimitError: 状态码为 429
+        Exception: 其他非 200 状态码
+    """
+    if response.status_code == 200:
+        return
+
+    body = response.text if preview_limit is None else response.text[:preview_limit]
+    message = f"API请求失败: {response.status_code} - {body}"
+    if response.status_code == 429:
+        raise RateLimitError(
+            message,
+            retry_after=_parse_retry_after(response.headers.get("Retry-After"))
+        )
+    raise Exception(message)
 
 
 def retry_on_error(max_retries=5, base_delay=3):
@@ -57,7 +244,12 @@ def retry_on_error(max_retries=5, base_delay=3):
                     # 检查是否是速率限制错误
                     if "429" in error_str or "rate" in error_str.lower():
                         if attempt < max_retries - 1:
-                            wait_time = (base_delay ** attempt) + random.uniform(0, 1)
+                            # 指数退避 + 抖动，优先遵循服务端的 Retry-After
+                            wait_time = base_delay * (2 ** attempt) + random.uniform(0, base_delay)
+                            retry_after = getattr(e, "retry_after", None)
+                            if retry_after is not None:
+                                wait_time = max(wait_time, retry_after)
+                            wait_time = min(wait_time, MAX_RETRY_DELAY)
                             logger.warning(
                                 f"遇到速率限制，{wait_time:.1f}秒后重试 "
                                 f"(尝试 {attempt + 2}/{max_retries})"
@@ -91,6 +283,52 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
     - Markdown图片链接: ![alt](url)（支持多图片返回）
     """
 
+    # 默认OpenAI支持的尺寸
+    _DEFAULT_SIZES: ClassVar[tuple] = (
+        "1024x1024",
+        "1792x1024",
+        "1024x1792",
+        "2048x2048",
+        "4096x4096"
+    )
+
+    # 进程级共享的下载线程池，避免每次候选下载都创建/销毁线程
+    _download_pool: ClassVar[ThreadPoolExecutor] = ThreadPoolExecutor(
+        max_workers=DOWNLOAD_POOL_MAX_WORKERS,
+        thread_name_prefix="img-dl"
+    )
+    # 共享的图片下载会话：同一 CDN 的候选图片复用 keep-alive 连接，避免重复 TLS 握手
+    # 注意：该会话不携带 API 鉴权头，避免泄露给第三方图床
+    _download_session: ClassVar[requests.Session] = requests.Session()
+    _download_session.mount("https://", HTTPAdapter(
+        pool_connections=DOWNLOAD_POOL_MAX_WORKERS,
+        pool_maxsize=DOWNLOAD_PER_HOST_CONCURRENCY
+    ))
+    _download_session.mount("http://", HTTPAdapter(
+        pool_connections=DOWNLOAD_POOL_MAX_WORKERS,
+        pool_maxsize=DOWNLOAD_PER_HOST_CONCURRENCY
+    ))
+    # 按域名限制并发下载数
+    _host_semaphores: ClassVar[Dict[str, threading.BoundedSemaphore]] = {}
+    _host_semaphores_lock: ClassVar[threading.Lock] = threading.Lock()
+    # 各磁盘缓存目录上次清理过期文件的时间
+    _cache_last_pruned: ClassVar[Dict[Path, float]] = {}
+    _cache_prune_lock: ClassVar[threading.Lock] = threading.Lock()
+    # 进程级共享的生成结果内存 LRU：ImageService 按任务创建生成器实例，实例级缓存几乎无法命中
+    _memory_cache: ClassVar["OrderedDict[str, Any]"] = OrderedDict()
+    _memory_cache_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @classmethod
+    def _get_host_semaphore(cls, url: str) -> threading.BoundedSemaphore:
+        """获取指定 URL 所属域名的并发信号量"""
+        host = urlsplit(url).netloc.lower()
+        with cls._host_semaphores_lock:
+            semaphore = cls._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(DOWNLOAD_PER_HOST_CONCURRENCY)
+                cls._host_semaphores[host] = semaphore
+            return semaphore
+
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
 
@@ -100,9 +338,17 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         if not self.base_url:
             raise ValueError("Base URL 未配置")
 
+        # 规范化 Base URL 并预先拼好各端点地址
+        self._base_url = self.base_url.rstrip('/')
+        self._images_url = f"{self._base_url}/v1/images/generations"
+        self._chat_url = f"{self._base_url}/v1/chat/completions"
+
         # 默认模型
         self.default_model = config.get('model', 'dall-e-3')
 
+        # 支持的图片尺寸（初始化时计算一次）
+        self._supported_sizes = tuple(config.get('supported_sizes') or self._DEFAULT_SIZES)
+
         # API 端点类型: 'images' 或 'chat'
         self.endpoint_type = config.get('endpoint_type', 'images')
 
@@ -128,6 +374,35 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         )
         self.download_chunk_size = config.get('download_chunk_size', 8192)  # 8KB chunks
 
+        # API 请求会话：复用 keep-alive 连接，鉴权头只构造一次
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=API_POOL_CONNECTIONS,
+            pool_maxsize=API_POOL_MAXSIZE,
+            max_retries=0
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
+
+        # 生成结果缓存（默认关闭：相同提示词的重新生成通常期望得到新图片）
+        # 键为 (prompt, size, model, quality, endpoint_type, 参考图) 的 SHA-256
+        self.image_cache_enabled = config.get('image_cache_enabled', False)
+        self._cache_dir = Path(config.get('image_cache_dir', DEFAULT_IMAGE_CACHE_DIR))
+        self.image_cache_ttl = config.get('image_cache_ttl', DEFAULT_IMAGE_CACHE_TTL)
+        self.image_cache_memory_items = config.get(
+            'image_cache_memory_items', DEFAULT_IMAGE_CACHE_MEMORY_ITEMS
+        )
+
+        # 图片 URL 分发表：按首字符选择解码或下载方式
+        self._image_url_handlers = {
+            'd': self._decode_base64_image_with_validation,
+            'h': self._stream_download_image,
+        }
+
         # 调试日志：输出关键配置
         logger.info(
             f"[CONFIG] OpenAI Compatible Generator 初始化: "
@@ -142,6 +417,15 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         """验证配置"""
         return bool(self.api_key and self.base_url)
 
+    def close(self) -> None:
+        """关闭 API 请求会话，释放连接池"""
+        self._session.close()
+
+    def __del__(self):
+        session = getattr(self, "_session", None)
+        if session is not None:
+            session.close()
+
     def _parse_image_index(self, value: Any) -> int:
         """
         解析图片索引配置值
@@ -166,6 +450,180 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             )
             return DEFAULT_IMAGE_INDEX
 
+    def _image_cache_key(
+        self,
+        kind: str,
+        prompt: str,
+        size: str,
+        model: str,
+        quality: str,
+        reference_images: List[bytes],
+        image_index: Optional[int] = None
+    ) -> str:
+        """
+        计算生成结果的缓存键
+
+        Args:
+            kind: 结果类型（single 或 candidates）
+            prompt: 提示词
+            size: 图片尺寸
+            model: 模型名称
+            quality: 质量
+            reference_images: 参考图片数据列表
+            image_index: 指定的图片索引
+
+        Returns:
+            32 位十六进制缓存键
+        """
+        hasher = hashlib.sha256(
+            f"{kind}|{prompt}|{size}|{model}|{quality}|{self.endpoint_type}|{image_index}".encode()
+        )
+        for img_data in reference_images:
+            hasher.update(hashlib.blake2b(img_data, digest_size=16).digest())
+        return hasher.hexdigest()[:32]
+
+    def _image_cache_get(self, key: str) -> Optional[Any]:
+        """
+        读取缓存（内存 LRU 优先，其次磁盘）
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            bytes（单图）或候选图片字典；未命中或已过期时返回 None
+        """
+        if not self.image_cache_enabled:
+            return None
+
+        with self._memory_cache_lock:
+            entry = self._memory_cache.get(key)
+            if entry is not None:
+                cached_at, value = entry
+                if time.time() - cached_at <= self.image_cache_ttl:
+                    self._memory_cache.move_to_end(key)
+                    logger.info(f"[CACHE] 内存缓存命中: {key}")
+                    return self._copy_cache_value(value)
+                del self._memory_cache[key]
+
+        try:
+            value = None
+            bin_path = self._cache_dir / f"{key}.bin"
+            json_path = self._cache_dir / f"{key}.json"
+            if self._cache_file_fresh(bin_path):
+                value = bin_path.read_bytes()
+            elif self._cache_file_fresh(json_path):
+                # 候选模式：JSON 索引记录各候选图片的内容哈希文件名
+                names = json.loads(json_path.read_text(encoding="utf-8"))
+                candidates = [(self._cache_dir / name).read_bytes() for name in names]
+                if candidates:
+                    value = {
+                        "primary": candidates[0],
+                        "candidates": candidates,
+                        "count": len(candidates)
+                    }
+        except (OSError, ValueError) as e:
+            logger.warning(f"[CACHE] 读取磁盘缓存失败: {key}, {e}")
+            return None
+
+        if value is not None:
+            logger.info(f"[CACHE] 磁盘缓存命中: {key}")
+            self._memory_cache_put(key, value)
+        return self._copy_cache_value(value)
+
+    def _image_cache_put(self, key: str, value: Any) -> None:
+        """
+        写入缓存（内存 LRU + 磁盘，磁盘写入为原子替换）
+
+        Args:
+            key: 缓存键
+            value: bytes（单图）或候选图片字典
+        """
+        if not self.image_cache_enabled:
+            return
+
+        self._memory_cache_put(key, value)
+
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            if isinstance(value, (bytes, bytearray)):
+                self._atomic_write_bytes(self._cache_dir / f"{key}.bin", value)
+            else:
+                names = []
+                for img_data in value["candidates"]:
+                    name = f"{hashlib.sha256(img_data).hexdigest()[:32]}.bin"
+                    self._atomic_write_bytes(self._cache_dir / name, img_data)
+                    names.append(name)
+                self._atomic_write_bytes(
+                    self._cache_dir / f"{key}.json",
+                    json.dumps(names).encode("utf-8")
+                )
+        except OSError as e:
+            logger.warning(f"[CACHE] 写入磁盘缓存失败: {key}, {e}")
+            return
+
+        self._prune_disk_cache()
+
+    def _prune_disk_cache(self) -> None:
+        """
+        删除磁盘缓存中已过期的文件（含异常退出遗留的临时文件）
+
+        读取时只校验 TTL 不会删除文件，这里在写入后按 IMAGE_CACHE_PRUNE_INTERVAL 节流清理，
+        避免缓存目录无限增长
+        """
+        now = time.time()
+        with self._cache_prune_lock:
+            if now - self._cache_last_pruned.get(self._cache_dir, 0) < IMAGE_CACHE_PRUNE_INTERVAL:
+                return
+            self._cache_last_pruned[self._cache_dir] = now
+
+        expire_before = now - self.image_cache_ttl
+        removed = 0
+        try:
+            with os.scandir(self._cache_dir) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file() and entry.stat().st_mtime < expire_before:
+                            os.unlink(entry.path)
+                            removed += 1
+                    except FileNotFoundError:
+                        continue
+        except OSError as e:
+            logger.warning(f"[CACHE] 清理磁盘缓存失败: {e}")
+            return
+
+        if removed:
+            logger.info(f"[CACHE] 已清理过期磁盘缓存文件: {removed} 个")
+
+    def _memory_cache_put(self, key: str, value: Any) -> None:
+        """写入内存 LRU，超出容量时淘汰最久未使用的条目"""
+        value = self._copy_cache_value(value)
+        with self._memory_cache_lock:
+            self._memory_cache[key] = (time.time(), value)
+            self._memory_cache.move_to_end(key)
+            while len(self._memory_cache) > self.image_cache_memory_items:
+                self._memory_cache.popitem(last=False)
+
+    @staticmethod
+    def _copy_cache_value(value: Any) -> Any:
+        """浅拷贝候选图片字典，避免调用方修改结果时影响缓存中的条目"""
+        if isinstance(value, dict):
+            return {**value, "candidates": list(value["candidates"])}
+        return value
+
+    def _cache_file_fresh(self, path: Path) -> bool:
+        """判断缓存文件是否存在且未过期"""
+        try:
+            return time.time() - path.stat().st_mtime <= self.image_cache_ttl
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _atomic_write_bytes(path: Path, data: bytes) -> None:
+        """先写临时文件再 os.replace，避免读到写了一半的缓存"""
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
     def _collect_reference_images(
         self,
         reference_image: Optional[bytes],
@@ -276,7 +734,7 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         stream: bool = False
     ) -> Dict[str, Any]:
         """
-        统一构造 chat API 请求所需的 url/headers/payload
+        统一构造 chat API 请求所需的 url/payload（鉴权头由会话统一携带）
 
         Args:
             model: 模型名称
@@ -286,15 +744,8 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             stream: 是否启用流式模式
 
         Returns:
-            包含 url, headers, payload 的字典
+            包含 url, payload 的字典
         """
-        url = f"{self.base_url.rstrip('/')}/v1/chat/completions"
-
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-
         messages = self._build_chat_messages_with_images(prompt, reference_images or [])
 
         payload = {
@@ -308,8 +759,7 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             payload["stream"] = True
 
         return {
-            "url": url,
-            "headers": headers,
+            "url": self._chat_url,
             "payload": payload
         }
 
@@ -330,11 +780,14 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         if not content:
             raise ValueError("API 响应内容为空")
 
+        # 只清理、扫描一次内容，结果供两项检查共用
+        analysis = _analyze_chat_content(content)
+
         # 优先检查明显的错误提示
-        self._raise_if_chat_content_is_error(content, prompt)
+        self._raise_if_chat_content_is_error(content, prompt, analysis)
 
         # 检测其他错误消息
-        error_message = self._detect_api_error_message(content)
+        error_message = self._detect_api_error_message(content, analysis)
         if error_message:
             raise ValueError(f"图片生成 API 返回错误: {error_message}")
 
@@ -343,14 +796,19 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
     def _process_chat_content(
         self,
         content: str,
+        prompt: str,
         image_index: Optional[int] = None,
         return_candidates: bool = False
     ):
         """
         统一处理 chat content，支持单图或候选图模式
 
+        优先尝试提取图片数据，仅在未找到图片时才进行错误检测，
+        避免成功路径上的多余内容扫描。
+
         Args:
-            content: 已验证的 API 响应内容
+            content: API 返回的原始内容
+            prompt: 原始提示词（用于错误信息）
             image_index: 指定返回第几张图片（None 表示使用配置的默认值）
             return_candidates: 是否返回所有候选图片
 
@@ -359,8 +817,11 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             Dict: 候选模式，返回 {primary, candidates, count}
 
         Raises:
-            ValueError: 无法识别的内容格式
+            ValueError: 内容为空、检测到错误或无法识别的内容格式
         """
+        if not content:
+            raise ValueError("API 响应内容为空")
+
         # 情况一：base64 data URL
         if content.startswith("data:image"):
             image_data = self._decode_base64_image(content)
@@ -380,12 +841,63 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
                 return self._download_all_images_from_urls(image_urls)
             return self._download_image_from_urls(image_urls, image_index)
 
+        # 未找到图片时再检测错误消息
+        self._validate_and_extract_content(content, prompt)
+
         # 无法识别的格式
         preview = content[:200].replace("\n", "\\n")
         raise ValueError(
             f"chat API 响应中未找到可识别的图片数据格式，content 预览: {preview}"
         )
 
+    def _read_response_body(self, response, max_bytes: int) -> bytes:
+        """
+        流式读取响应体到预分配缓冲区，并检查累计大小
+
+        根据 Content-Length 预分配 bytearray，分块直接写入，
+        避免 response.content 的整体缓冲与扩容拷贝。
+
+        Args:
+            response: requests 的 Response 对象（stream=True）
+            max_bytes: 允许的最大字节数
+
+        Returns:
+            响应体二进制数据
+
+        Raises:
+            ValueError: 大小超限
+        """
+        # 检查 Content-Length（如果提供），并据此预分配缓冲区
+        expected_size = 0
+        content_length = response.headers.get("Content-Length")
+        if content_length:
+            try:
+                expected_size = int(content_length)
+            except (ValueError, TypeError):
+                logger.warning(f"无法解析 Content-Length: {content_length}")
+            if expected_size > max_bytes:
+                raise ValueError(
+                    f"图片大小超过限制: {expected_size} bytes > {max_bytes} bytes"
+                )
+
+        buffer = bytearray(max(expected_size, 0))
+        offset = 0
+        for chunk in response.raw.stream(self.download_chunk_size, decode_content=True):
+            if not chunk:
+                continue
+            end = offset + len(chunk)
+            if end > max_bytes:
+                raise ValueError(
+                    f"图片累计大小超过限制: {end} bytes > {max_bytes} bytes"
+                )
+            # 在预分配区域内原地写入，超出部分由切片赋值自动扩容
+            buffer[offset:end] = chunk
+            offset = end
+
+        # 实际长度可能小于 Content-Length（如压缩传输），截掉多余部分
+        del buffer[offset:]
+        return bytes(buffer)
+
     def _stream_download_image(self, url: str) -> bytes:
         """
         流式下载图片，带大小和 Content-Type 校验
@@ -403,8 +915,8 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         logger.debug(f"开始流式下载图片: {url[:100]}")
 
         try:
-            # 使用上下文管理器确保连接正确关闭
-            with requests.get(
+            # 使用上下文管理器确保连接正确关闭，并限制同域名并发数
+            with self._get_host_semaphore(url), self._download_session.get(
                 url,
                 timeout=DEFAULT_DOWNLOAD_TIMEOUT,
                 stream=True
@@ -420,35 +932,13 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
                             f"仅允许: {', '.join(self.download_allowed_content_types)}"
                         )
 
-                # 检查 Content-Length（如果提供）
-                max_bytes = self.download_max_bytes
-                content_length = response.headers.get("Content-Length")
-                if content_length:
-                    try:
-                        size = int(content_length)
-                        if size > max_bytes:
-                            raise ValueError(
-                                f"图片大小超过限制: {size} bytes > {max_bytes} bytes"
-                            )
-                    except (ValueError, TypeError):
-                        logger.warning(f"无法解析 Content-Length: {content_length}")
-
-                # 流式读取并检查累计大小
-                data = bytearray()
-                for chunk in response.iter_content(chunk_size=self.download_chunk_size):
-                    if not chunk:
-                        continue
-                    data.extend(chunk)
-                    if len(data) > max_bytes:
-                        raise ValueError(
-                            f"图片累计大小超过限制: {len(data)} bytes > {max_bytes} bytes"
-                        )
+                data = self._read_response_body(response, self.download_max_bytes)
 
                 if not data:
                     raise ValueError("图片内容为空")
 
                 logger.debug(f"成功下载图片，大小: {len(data)} bytes")
-                return bytes(data)
+                return data
 
         except requests.RequestException as e:
             raise ValueError(f"下载图片请求失败: {e}") from e
@@ -497,21 +987,31 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             f"reference_images_count={len(all_reference_images)}"
         )
 
+        cache_key = None
+        if self.image_cache_enabled:
+            cache_key = self._image_cache_key(
+                "single", prompt, size, model, quality,
+                all_reference_images, image_index
+            )
+            cached = self._image_cache_get(cache_key)
+            if cached is not None:
+                return cached
+
         if self.endpoint_type == 'images':
             logger.info("[GENERATE] 选择路径: images API")
-            return self._generate_via_images_api(prompt, size, model, quality)
+            image_data = self._generate_via_images_api(prompt, size, model, quality)
         elif self.endpoint_type == 'chat':
             # 根据配置选择流式或非流式模式
             if self.chat_stream_enabled:
                 logger.info("[GENERATE] 选择路径: chat API (流式)")
-                return self._generate_via_chat_api_streaming(
+                image_data = self._generate_via_chat_api_streaming(
                     prompt, size, model,
                     image_index=image_index,
                     reference_images=all_reference_images
                 )
             else:
                 logger.info("[GENERATE] 选择路径: chat API (非流式)")
-                return self._generate_via_chat_api(
+                image_data = self._generate_via_chat_api(
                     prompt, size, model,
                     image_index=image_index,
                     reference_images=all_reference_images
@@ -519,6 +1019,10 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         else:
             raise ValueError(f"不支持的端点类型: {self.endpoint_type}")
 
+        if cache_key is not None:
+            self._image_cache_put(cache_key, image_data)
+        return image_data
+
     @retry_on_error(max_retries=5, base_delay=3)
     def generate_image_with_candidates(
         self,
@@ -559,16 +1063,25 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             reference_image, reference_images
         )
 
+        cache_key = None
+        if self.image_cache_enabled:
+            cache_key = self._image_cache_key(
+                "candidates", prompt, size, model, quality, all_reference_images
+            )
+            cached = self._image_cache_get(cache_key)
+            if cached is not None:
+                return cached
+
         if self.endpoint_type == 'images':
             # images API 通常只返回一张图片
             image_data = self._generate_via_images_api(prompt, size, model, quality)
-            return {
+            result = {
                 "primary": image_data,
                 "candidates": [image_data],
                 "count": 1
             }
         elif self.endpoint_type == 'chat':
-            return self._generate_via_chat_api_with_candidates(
+            result = self._generate_via_chat_api_with_candidates(
                 prompt,
                 size,
                 model,
@@ -577,6 +1090,10 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         else:
             raise ValueError(f"不支持的端点类型: {self.endpoint_type}")
 
+        if cache_key is not None:
+            self._image_cache_put(cache_key, result)
+        return result
+
     def _generate_via_images_api(
         self,
         prompt: str,
@@ -585,13 +1102,6 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         quality: str
     ) -> bytes:
         """通过 /v1/images/generations 端点生成"""
-        url = f"{self.base_url.rstrip('/')}/v1/images/generations"
-
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-
         payload = {
             "model": model,
             "prompt": prompt,
@@ -604,12 +1114,21 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         if quality and model.startswith('dall-e'):
             payload["quality"] = quality
 
-        response = requests.post(url, headers=headers, json=payload, timeout=180)
+        response = self._session.post(
+            self._images_url, data=fast_json.dumps(payload), timeout=180
+        )
+
+        _raise_for_api_status(response)
 
-        if response.status_code != 200:
-            raise Exception(f"API请求失败: {response.status_code} - {response.text}")
+        raw = response.content
 
-        result = response.json()
+        # 快速路径：直接从原始响应字节中截取 b64_json 并解码，跳过完整 JSON 解析
+        # 含转义字符时（如 \/）回退到常规解析，保证结果正确
+        match = _B64_JSON_RE.search(raw)
+        if match and b"\\" not in match.group(1):
+            return base64.b64decode(match.group(1))
+
+        result = fast_json.loads(raw)
 
         if "data" not in result or len(result["data"]) == 0:
             raise ValueError("API未返回图片数据")
@@ -622,11 +1141,13 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
 
         # 处理URL格式
         elif "url" in image_data:
-            img_response = requests.get(image_data["url"], timeout=60)
-            if img_response.status_code == 200:
-                return img_response.content
-            else:
-                raise Exception(f"下载图片失败: {img_response.status_code}")
+            with self._download_session.get(
+                image_data["url"], timeout=60, stream=True
+            ) as img_response:
+                if img_response.status_code == 200:
+                    return self._read_response_body(img_response, self.download_max_bytes)
+                else:
+                    raise Exception(f"下载图片失败: {img_response.status_code}")
 
         else:
             raise ValueError("未找到图片数据")
@@ -820,18 +1341,14 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         )
 
         # 发送流式请求
-        response = requests.post(
+        response = self._session.post(
             request["url"],
-            headers=request["headers"],
-            json=request["payload"],
+            data=fast_json.dumps(request["payload"]),
             stream=True,
             timeout=(10, self.chat_stream_idle_timeout)
         )
 
-        if response.status_code != 200:
-            raise Exception(
-                f"API请求失败: {response.status_code} - {response.text[:500]}"
-            )
+        _raise_for_api_status(response, preview_limit=500)
 
         # 解析SSE流
         content = self._parse_sse_stream(response)
@@ -842,9 +1359,8 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         if not content:
             raise ValueError("SSE流中未返回任何内容")
 
-        # 验证并处理内容
-        content = self._validate_and_extract_content(content, prompt)
-        return self._process_chat_content(content, image_index=image_index, return_candidates=False)
+        # 处理内容
+        return self._process_chat_content(content, prompt, image_index=image_index, return_candidates=False)
 
     def _generate_via_chat_api(
         self,
@@ -896,32 +1412,18 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             f"prompt_length={len(safe_prompt)}, reference_images={ref_count}"
         )
 
-        response = requests.post(
+        response = self._session.post(
             request["url"],
-            headers=request["headers"],
-            json=request["payload"],
+            data=fast_json.dumps(request["payload"]),
             timeout=DEFAULT_REQUEST_TIMEOUT
         )
 
-        if response.status_code != 200:
-            raise Exception(f"API请求失败: {response.status_code} - {response.text}")
+        _raise_for_api_status(response)
 
-        result = response.json()
+        content = self._extract_chat_response_content(response.content)
 
-        # 验证响应结构
-        if "choices" not in result or len(result["choices"]) == 0:
-            raise ValueError("chat API 响应缺少 choices 字段或为空")
-
-        choice = result["choices"][0]
-        if "message" not in choice:
-            raise ValueError("chat API 响应缺少 message 字段")
-
-        message = choice["message"]
-        content = self._extract_content_from_message(message)
-
-        # 验证并处理内容
-        content = self._validate_and_extract_content(content, prompt)
-        return self._process_chat_content(content, image_index=image_index, return_candidates=False)
+        # 处理内容
+        return self._process_chat_content(content, prompt, image_index=image_index, return_candidates=False)
 
     def _generate_via_chat_api_with_candidates(
         self,
@@ -999,32 +1501,18 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             f"prompt_length={len(safe_prompt)}, reference_images={ref_count}"
         )
 
-        response = requests.post(
+        response = self._session.post(
             request["url"],
-            headers=request["headers"],
-            json=request["payload"],
+            data=fast_json.dumps(request["payload"]),
             timeout=DEFAULT_REQUEST_TIMEOUT
         )
 
-        if response.status_code != 200:
-            raise Exception(f"API请求失败: {response.status_code} - {response.text}")
+        _raise_for_api_status(response)
 
-        result = response.json()
+        content = self._extract_chat_response_content(response.content)
 
-        # 验证响应结构
-        if "choices" not in result or len(result["choices"]) == 0:
-            raise ValueError("chat API 响应缺少 choices 字段或为空")
-
-        choice = result["choices"][0]
-        if "message" not in choice:
-            raise ValueError("chat API 响应缺少 message 字段")
-
-        message = choice["message"]
-        content = self._extract_content_from_message(message)
-
-        # 验证并处理内容（候选模式）
-        content = self._validate_and_extract_content(content, prompt)
-        return self._process_chat_content(content, return_candidates=True)
+        # 处理内容（候选模式）
+        return self._process_chat_content(content, prompt, return_candidates=True)
 
     def _generate_via_chat_api_streaming_with_candidates(
         self,
@@ -1069,18 +1557,14 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         )
 
         # 使用流式请求，设置合理的超时时间
-        response = requests.post(
+        response = self._session.post(
             request["url"],
-            headers=request["headers"],
-            json=request["payload"],
+            data=fast_json.dumps(request["payload"]),
             stream=True,
             timeout=(10, self.chat_stream_idle_timeout)
         )
 
-        if response.status_code != 200:
-            raise Exception(
-                f"API请求失败: {response.status_code} - {response.text[:500]}"
-            )
+        _raise_for_api_status(response, preview_limit=500)
 
         # 解析SSE流，累积所有content
         content = self._parse_sse_stream(response)
@@ -1091,9 +1575,8 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         if not content:
             raise ValueError("SSE流中未返回任何内容")
 
-        # 验证并处理内容（候选模式）
-        content = self._validate_and_extract_content(content, prompt)
-        return self._process_chat_content(content, return_candidates=True)
+        # 处理内容（候选模式）
+        return self._process_chat_content(content, prompt, return_candidates=True)
 
     def _download_all_images_from_urls(self, urls: List[str]) -> Dict[str, Any]:
         """
@@ -1136,25 +1619,42 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
                 logger.warning(f"候选图片 {idx + 1} 处理异常: {e}")
                 return (idx, None, str(e))
 
-        # 使用线程池并发下载，最多10个线程
-        max_workers = min(len(urls), 10)
-        results = [None] * len(urls)  # 保持顺序
+        # 去重：相同 URL 只下载一次，结果回填到所有对应索引
+        # data URL 可能很长，使用短哈希作为去重键
+        unique_urls = {}
+        idx_to_key = []
+        for idx, url in enumerate(urls):
+            if url.startswith("data:"):
+                key = hashlib.blake2b(url.encode(), digest_size=8).digest()
+            else:
+                key = url
+            idx_to_key.append(key)
+            unique_urls.setdefault(key, (idx, url))
+
+        if len(unique_urls) < len(urls):
+            logger.info(f"候选图片 URL 去重: {len(urls)} -> {len(unique_urls)}")
+
+        # 使用进程级共享线程池并发下载
+        key_to_result = {}
         errors = []
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有下载任务
-            future_to_idx = {
-                executor.submit(download_single_image, idx, url): idx
-                for idx, url in enumerate(urls)
-            }
+        # 提交所有下载任务
+        future_to_key = {
+            self._download_pool.submit(download_single_image, idx, url): key
+            for key, (idx, url) in unique_urls.items()
+        }
 
-            # 收集结果
-            for future in as_completed(future_to_idx):
-                idx, image_data, error = future.result()
-                if image_data:
-                    results[idx] = image_data
-                else:
-                    errors.append(error)
+        # 等待全部完成后一次性收集结果
+        done, _ = wait(future_to_key)
+        for future in done:
+            idx, image_data, error = future.result()
+            if image_data:
+                key_to_result[future_to_key[future]] = image_data
+            else:
+                errors.append(error)
+
+        # 按原始索引回填结果（重复 URL 共享同一份数据）
+        results = [key_to_result.get(key) for key in idx_to_key]
 
         # 过滤掉 None 值，保持原始顺序
         candidates = [img for img in results if img is not None]
@@ -1172,33 +1672,6 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             "count": len(candidates)
         }
 
-    def _strip_markdown_code_block(self, text: str) -> str:
-        """
-        移除 Markdown 代码块标记
-
-        Args:
-            text: 可能包含代码块标记的文本
-
-        Returns:
-            清理后的文本
-        """
-        text = text.strip()
-        if not text.startswith("```"):
-            return text
-
-        lines = text.split("\n")
-        if len(lines) < 2:
-            return text
-
-        # 去掉首行的 ``` 和末行的 ```
-        inner_lines = []
-        for line in lines[1:]:
-            if line.strip() == "```":
-                break
-            inner_lines.append(line)
-
-        return "\n".join(inner_lines).strip()
-
     def _prepare_chat_prompt(self, prompt: str) -> str:
         """
         对 chat 接口的提示词进行预处理（长度检查和截断）
@@ -1219,28 +1692,34 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             ValueError: 当策略为 "error" 且提示词超长时
         """
         max_chars = self.config.get("chat_prompt_max_chars")
-        if not isinstance(max_chars, int) or max_chars <= 0:
+        if max_chars is None or not isinstance(max_chars, int) or max_chars <= 0:
             # 未配置长度限制时直接返回原始提示词
             return prompt
 
-        if len(prompt) <= max_chars:
+        prompt_len = len(prompt)
+        if prompt_len <= max_chars:
             return prompt
 
         strategy = self.config.get("chat_prompt_strategy", "truncate")
         if strategy == "error":
             raise ValueError(
-                f"提示词长度为 {len(prompt)} 字符，超过当前服务商配置的上限 "
+                f"提示词长度为 {prompt_len} 字符，超过当前服务商配置的上限 "
                 f"{max_chars} 字符，请精简提示词后重试。"
             )
 
         # 默认策略：截断并给出日志提示
         logger.warning(
             f"提示词长度超过当前服务商配置的上限，已自动截断: "
-            f"original_len={len(prompt)}, max_chars={max_chars}"
+            f"original_len={prompt_len}, max_chars={max_chars}"
         )
         return prompt[:max_chars]
 
-    def _raise_if_chat_content_is_error(self, content: str, prompt: str) -> None:
+    def _raise_if_chat_content_is_error(
+        self,
+        content: str,
+        prompt: str,
+        analysis: Optional[Tuple[str, bool, bool]] = None
+    ) -> None:
         """
         检查 chat 接口返回的内容是否为明显的错误提示
 
@@ -1249,6 +1728,7 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         Args:
             content: API 返回的内容
             prompt: 原始提示词（用于计算长度）
+            analysis: 调用方已计算的 _analyze_chat_content 结果（None 时自行计算）
 
         Raises:
             ValueError: 当检测到错误提示时
@@ -1256,45 +1736,61 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         if not content:
             return
 
-        # 清理内容（去除markdown代码块格式）
-        text = self._strip_markdown_code_block(content)
-
-        # 提示词长度超限相关的关键字（区分纯文本和正则）
-        plain_keywords = [
-            "不能超过",
-            "不得超过",
-            "超出最大长度",
-            "too long",
-        ]
-
-        regex_patterns = [
-            r"超过.*字符",
-            r"exceeds.*maximum.*length",
-            r"maximum.*length.*exceeded",
-        ]
-
-        # 检查是否包含长度限制相关的关键字
-        has_length_error = (
-            any(keyword in text for keyword in plain_keywords) or
-            any(re.search(pattern, text, re.IGNORECASE) for pattern in regex_patterns)
-        )
+        # 清理内容（去除markdown代码块格式）并检查长度限制相关的关键字
+        text, has_length_error, _ = analysis or _analyze_chat_content(content)
 
         if has_length_error:
+            prompt_len = len(prompt)
             # 尝试从提示中解析具体上限，例如："不能超过 1600 个字符"
-            match = re.search(r"(\d+)\s*个?字符", text)
+            match = _CHAR_LIMIT_RE.search(text)
             if match:
                 limit = match.group(1)
                 raise ValueError(
                     f"图片生成失败：提示词长度超过服务商限制。"
-                    f"当前长度为 {len(prompt)} 字符，建议控制在 {limit} 字符以内。"
+                    f"当前长度为 {prompt_len} 字符，建议控制在 {limit} 字符以内。"
                 )
 
             # 未能解析出具体上限时，直接附带原始服务端提示
             raise ValueError(
                 f"图片生成失败：提示词长度可能超过服务商限制。"
-                f"当前长度为 {len(prompt)} 字符，服务端返回: {text[:200]}"
+                f"当前长度为 {prompt_len} 字符，服务端返回: {text[:200]}"
             )
 
+    def _extract_chat_response_content(self, raw: bytes) -> str:
+        """
+        从非流式 chat API 响应体中提取 content 字符串
+
+        当 content 本身就是 base64 data URL 时，直接在原始字节上截取，
+        跳过对数 MB 响应体的完整 JSON 解析；其余情况走常规解析。
+
+        Args:
+            raw: 响应体原始字节
+
+        Returns:
+            content 字符串
+
+        Raises:
+            ValueError: 响应结构不符合预期
+        """
+        # 快速探测：data URL 通常紧跟在 content 字段之后，只检查开头部分
+        if b'"data:image' in raw[:4096]:
+            match = _CHAT_DATA_URL_CONTENT_RE.search(raw)
+            # 含转义或非 ASCII 字符时回退到常规解析，保证结果正确
+            if match and match.group(1).isascii() and b"\\" not in match.group(1):
+                return match.group(1).decode("ascii")
+
+        result = fast_json.loads(raw)
+
+        # 验证响应结构
+        if "choices" not in result or len(result["choices"]) == 0:
+            raise ValueError("chat API 响应缺少 choices 字段或为空")
+
+        choice = result["choices"][0]
+        if "message" not in choice:
+            raise ValueError("chat API 响应缺少 message 字段")
+
+        return self._extract_content_from_message(choice["message"])
+
     def _extract_content_from_message(self, message: Dict[str, Any]) -> str:
         """
         从message中提取content字符串
@@ -1330,7 +1826,11 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             f"chat API 响应中的 content 类型不受支持: {type(content)}"
         )
 
-    def _detect_api_error_message(self, content: str) -> Optional[str]:
+    def _detect_api_error_message(
+        self,
+        content: str,
+        analysis: Optional[Tuple[str, bool, bool]] = None
+    ) -> Optional[str]:
         """
         检测API响应中的错误消息
 
@@ -1339,6 +1839,7 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
 
         Args:
             content: 从API响应中提取的content字符串
+            analysis: 调用方已计算的 _analyze_chat_content 结果（None 时自行计算）
 
         Returns:
             如果检测到错误消息，返回错误内容；否则返回None
@@ -1346,40 +1847,14 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         if not content or not isinstance(content, str):
             return None
 
-        # 清理内容（去除markdown代码块格式）
-        cleaned = self._strip_markdown_code_block(content)
-
-        # 错误模式列表：(模式, 是否为正则表达式)
-        error_patterns = [
-            # 字符/长度限制相关
-            (r"不能超过\s*\d+\s*个字符", True),
-            (r"超过.*字符限制", True),
-            (r"prompt.*too long", True),
-            (r"exceeds.*limit", True),
-            (r"maximum.*length", True),
-            # 内容审核相关
-            ("内容违规", False),
-            ("content policy", False),
-            ("违反.*政策", True),
-            # 配额/限制相关
-            ("配额不足", False),
-            ("quota exceeded", False),
-            ("rate limit", False),
-            # 参数错误相关
-            ("参数错误", False),
-            ("invalid parameter", False),
-            ("参数无效", False),
-        ]
-
-        content_lower = cleaned.lower()
+        # 快速路径：内容本身就是图片数据（data URL / Markdown 图片）时跳过所有模式匹配
+        if content.startswith(("data:image", "![")):
+            return None
 
-        for pattern, is_regex in error_patterns:
-            if is_regex:
-                if re.search(pattern, cleaned, re.IGNORECASE):
-                    return cleaned
-            else:
-                if pattern.lower() in content_lower:
-                    return cleaned
+        # 清理内容（去除markdown代码块格式）并匹配错误模式（与长度检查共享分析结果）
+        cleaned, _, has_api_error = analysis or _analyze_chat_content(content)
+        if has_api_error:
+            return cleaned
 
         # 额外检查：如果content很短且不包含图片相关内容，可能是错误
         if len(cleaned) < 500:
@@ -1387,11 +1862,11 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             has_image_indicator = (
                 cleaned.startswith("data:image") or
                 "![" in cleaned or
-                re.search(r'https?://.*\.(png|jpg|jpeg|gif|webp)', cleaned, re.I)
+                _IMAGE_URL_RE.search(cleaned)
             )
             if not has_image_indicator:
                 # 检查是否像是纯文本错误消息（无URL、无markdown图片语法）
-                if not re.search(r'https?://', cleaned):
+                if not _HTTP_URL_RE.search(cleaned):
                     # 可能是错误消息，但不确定，记录日志但不阻断
                     logger.warning(
                         f"API响应可能为错误消息（短文本无图片指示）: {cleaned[:100]}"
@@ -1413,12 +1888,12 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             ValueError: data URL格式不正确
         """
         try:
-            # 分割并提取base64部分
-            if "," not in data_url:
+            # 定位逗号并提取base64部分
+            comma = data_url.find(",")
+            if comma < 0:
                 raise ValueError("data URL 缺少逗号分隔符")
-            base64_data = data_url.split(",", 1)[1]
-            return base64.b64decode(base64_data)
-        except (IndexError, base64.binascii.Error) as e:
+            return base64.b64decode(data_url[comma + 1:])
+        except (IndexError, binascii.Error) as e:
             raise ValueError(
                 f"chat API 响应中的 base64 图片数据格式不正确: {str(e)}"
             ) from e
@@ -1486,7 +1961,7 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
             )
             return image_data
 
-        except (IndexError, base64.binascii.Error) as e:
+        except (IndexError, binascii.Error) as e:
             raise ValueError(
                 f"base64 图片数据格式不正确: {str(e)}"
             ) from e
@@ -1510,7 +1985,7 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
 
         try:
             # 使用正则表达式提取所有 ![...](url) 格式的URL
-            urls = re.findall(MARKDOWN_IMAGE_PATTERN, content)
+            urls = _MARKDOWN_IMAGE_RE.findall(content)
             # 过滤掉空字符串和无效URL
             valid_urls = [
                 url.strip() for url in urls
@@ -1537,17 +2012,13 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         # 规范化 URL（去除首尾空格）
         url = url.strip()
 
-        # 情况1: base64 data URL（大小写不敏感）
-        if url.lower().startswith("data:image"):
-            logger.debug("检测到 base64 data URL，进行安全校验并解码")
-            return self._decode_base64_image_with_validation(url)
+        # 仅支持 base64 data URL 与 HTTP(S) URL（大小写不敏感）
+        if not _SUPPORTED_IMAGE_URL_RE.match(url):
+            raise ValueError(f"不支持的 URL 格式: {url[:100]}")
 
-        # 情况2: HTTP(S) URL
-        if url.startswith(("http://", "https://")):
-            return self._stream_download_image(url)
-
-        # 不支持的格式
-        raise ValueError(f"不支持的 URL 格式: {url[:100]}")
+        # 按首字符分发：d -> base64 解码（含安全校验），h -> 流式下载
+        handler = self._image_url_handlers[url[0].lower()]
+        return handler(url)
 
     def _download_image_from_urls(
         self,
@@ -1576,9 +2047,10 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
         target_index = self._determine_image_index(image_index, len(urls))
 
         # 构造下载顺序：优先尝试指定索引，其次依次尝试其他索引作为fallback
-        indices_to_try = [target_index] + [
-            i for i in range(len(urls)) if i != target_index
-        ]
+        indices_to_try = chain(
+            (target_index,),
+            (i for i in range(len(urls)) if i != target_index)
+        )
 
         last_error = None
         for idx in indices_to_try:
@@ -1631,13 +2103,15 @@ class OpenAICompatibleGenerator(ImageGeneratorBase):
 
         return index
 
-    def get_supported_sizes(self) -> list:
-        """获取支持的图片尺寸"""
-        # 默认OpenAI支持的尺寸
-        return self.config.get('supported_sizes', [
-            "1024x1024",
-            "1792x1024",
-            "1024x1792",
-            "2048x2048",
-            "4096x4096"
-        ])
+    def get_supported_sizes(self) -> List[str]:
+        """获取支持的图片尺寸（返回副本，调用方修改不影响缓存的元组）"""
+        return list(self._supported_sizes)
+
+
+def _shutdown_download_resources() -> None:
+    """进程退出时关闭共享下载线程池与会话"""
+    OpenAICompatibleGenerator._download_pool.shutdown(wait=False)
+    OpenAICompatibleGenerator._download_session.close()
+
+
+atexit.register(_shutdown_download_resources)
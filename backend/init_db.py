@@ -4,15 +4,19 @@
 用于创建数据库表结构和初始数据
 """
 import logging
+import re
 import sys
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
+import sqlalchemy as sa
+
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.db import init_db, get_db
 from backend.models import Role, Permission, RolePermission, User
-from backend.auth import hash_password
 from backend.config import Config
 
 logging.basicConfig(
@@ -21,69 +25,94 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 邮箱格式校验（模块加载时编译一次）
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+@contextmanager
+def stage(name: str):
+    """记录初始化阶段耗时，便于定位启动缓慢的环节"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        logger.info(f"阶段 {name} 耗时 {time.perf_counter() - start:.3f}s")
+
+
+def _insert_ignore(db, model):
+    """
+    构造忽略唯一约束冲突的 INSERT 语句，多进程同时初始化时不会因重复插入报错
+
+    Args:
+        db: 数据库会话
+        model: ORM 模型类
+
+    Returns:
+        按数据库方言生成的 INSERT 语句
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(model).on_conflict_do_nothing()
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(model).on_conflict_do_nothing()
+    if dialect in ('mysql', 'mariadb'):
+        return sa.insert(model).prefix_with('IGNORE')
+    return sa.insert(model)
+
 
 def create_default_roles_and_permissions():
     """创建默认角色和权限"""
     db = get_db()
     try:
-        # 检查是否已存在角色
-        existing_roles = db.query(Role).count()
-        if existing_roles > 0:
+        # 检查是否已存在角色（LIMIT 1 探测，无需 COUNT 全表）
+        # 已初始化时直接返回；并发初始化由下面的冲突忽略插入保证幂等
+        existing_role = db.execute(sa.select(Role.id).limit(1)).first()
+        if existing_role:
             logger.info("角色和权限已存在，跳过初始化")
             return
 
         logger.info("正在创建默认角色和权限...")
 
-        # 创建角色
-        roles = {
-            'user': Role(name='user', description='普通用户'),
-            'pro': Role(name='pro', description='专业版用户'),
-            'admin': Role(name='admin', description='管理员'),
-        }
-
-        for role in roles.values():
-            db.add(role)
+        # 创建角色（批量插入，忽略唯一约束冲突，整个初始化在同一事务内完成）
+        roles = [
+            {'name': 'user', 'description': '普通用户'},
+            {'name': 'pro', 'description': '专业版用户'},
+            {'name': 'admin', 'description': '管理员'},
+        ]
 
-        db.commit()
+        db.execute(_insert_ignore(db, Role), roles)
 
-        # 创建权限
+        # 创建权限（批量插入）
         permissions = [
             # 历史记录权限
-            Permission(code='history.read', name='查看历史记录', description='查看自己的历史记录'),
-            Permission(code='history.write', name='创建历史记录', description='创建新的历史记录'),
-            Permission(code='history.update', name='更新历史记录', description='更新自己的历史记录'),
-            Permission(code='history.delete', name='删除历史记录', description='删除自己的历史记录'),
-            Permission(code='history.read_all', name='查看所有历史记录', description='查看所有用户的历史记录（管理员）'),
+            {'code': 'history.read', 'name': '查看历史记录', 'description': '查看自己的历史记录'},
+            {'code': 'history.write', 'name': '创建历史记录', 'description': '创建新的历史记录'},
+            {'code': 'history.update', 'name': '更新历史记录', 'description': '更新自己的历史记录'},
+            {'code': 'history.delete', 'name': '删除历史记录', 'description': '删除自己的历史记录'},
+            {'code': 'history.read_all', 'name': '查看所有历史记录', 'description': '查看所有用户的历史记录（管理员）'},
 
             # 生成权限
-            Permission(code='generate.outline', name='生成大纲', description='生成内容大纲'),
-            Permission(code='generate.image', name='生成图片', description='生成图片'),
+            {'code': 'generate.outline', 'name': '生成大纲', 'description': '生成内容大纲'},
+            {'code': 'generate.image', 'name': '生成图片', 'description': '生成图片'},
 
             # 用量权限
-            Permission(code='usage.view', name='查看用量', description='查看自己的用量统计'),
-            Permission(code='usage.view_all', name='查看所有用量', description='查看所有用户的用量统计（管理员）'),
+            {'code': 'usage.view', 'name': '查看用量', 'description': '查看自己的用量统计'},
+            {'code': 'usage.view_all', 'name': '查看所有用量', 'description': '查看所有用户的用量统计（管理员）'},
 
             # 用户管理权限
-            Permission(code='user.read', name='查看用户', description='查看用户信息'),
-            Permission(code='user.update', name='更新用户', description='更新用户信息'),
-            Permission(code='user.delete', name='删除用户', description='删除用户（管理员）'),
-            Permission(code='user.manage', name='管理用户', description='管理所有用户（管理员）'),
+            {'code': 'user.read', 'name': '查看用户', 'description': '查看用户信息'},
+            {'code': 'user.update', 'name': '更新用户', 'description': '更新用户信息'},
+            {'code': 'user.delete', 'name': '删除用户', 'description': '删除用户（管理员）'},
+            {'code': 'user.manage', 'name': '管理用户', 'description': '管理所有用户（管理员）'},
 
             # 计费权限（预留）
-            Permission(code='billing.view', name='查看计费', description='查看计费信息'),
-            Permission(code='billing.manage', name='管理计费', description='管理计费系统（管理员）'),
+            {'code': 'billing.view', 'name': '查看计费', 'description': '查看计费信息'},
+            {'code': 'billing.manage', 'name': '管理计费', 'description': '管理计费系统（管理员）'},
         ]
 
-        for permission in permissions:
-            db.add(permission)
-
-        db.commit()
-
-        # 刷新对象以获取 ID
-        for role in roles.values():
-            db.refresh(role)
-        for permission in permissions:
-            db.refresh(permission)
+        db.execute(_insert_ignore(db, Permission), permissions)
 
         # 分配权限给角色
         # 普通用户权限
@@ -94,23 +123,23 @@ def create_default_roles_and_permissions():
             'user.read', 'user.update',
         ]
 
-        for perm_code in user_permissions:
-            perm = next((p for p in permissions if p.code == perm_code), None)
-            if perm:
-                db.add(RolePermission(role_id=roles['user'].id, permission_id=perm.id))
-
-        # 专业版用户权限（继承普通用户 + 额外权限）
-        pro_permissions = user_permissions + ['billing.view']
-
-        for perm_code in pro_permissions:
-            perm = next((p for p in permissions if p.code == perm_code), None)
-            if perm:
-                db.add(RolePermission(role_id=roles['pro'].id, permission_id=perm.id))
-
-        # 管理员权限（所有权限）
-        for perm in permissions:
-            db.add(RolePermission(role_id=roles['admin'].id, permission_id=perm.id))
+        role_permission_conditions = [
+            sa.and_(Role.name == 'user', Permission.code.in_(user_permissions)),
+            # 专业版用户权限（继承普通用户 + 额外权限）
+            sa.and_(Role.name == 'pro', Permission.code.in_(user_permissions + ['billing.view'])),
+            # 管理员权限（所有权限）
+            Role.name == 'admin',
+        ]
 
+        # INSERT ... SELECT 由数据库直接按名称/代码关联 ID，无需先查回角色和权限 ID
+        db.execute(
+            _insert_ignore(db, RolePermission).from_select(
+                ['role_id', 'permission_id'],
+                sa.select(Role.id, Permission.id)
+                .select_from(sa.join(Role, Permission, sa.true()))
+                .where(sa.or_(*role_permission_conditions)),
+            )
+        )
         db.commit()
 
         logger.info(f"成功创建 {len(roles)} 个角色和 {len(permissions)} 个权限")
@@ -138,76 +167,91 @@ def bootstrap_initial_admin():
         logger.info("管理员自动创建功能已关闭")
         return
 
-    db = get_db()
-    try:
-        # 检查是否已存在管理员
-        existing_admin = db.query(User).filter(User.role == 'admin').first()
-        if existing_admin:
-            logger.info(f"系统中已存在管理员账户,跳过自动创建")
-            return
+    # 先完成纯配置校验，校验不通过时无需获取数据库连接
+    # 检查环境变量配置是否完整
+    if not Config.INITIAL_ADMIN_PASSWORD:
+        logger.info(
+            "未设置 INITIAL_ADMIN_PASSWORD 环境变量,跳过管理员自动创建。"
+            "如系统中尚无管理员,请运行 'python backend/create_admin.py' 手动创建"
+        )
+        return
 
-        # 检查环境变量配置是否完整
-        if not Config.INITIAL_ADMIN_PASSWORD:
-            logger.warning(
-                "未设置 INITIAL_ADMIN_PASSWORD 环境变量,"
-                "无法自动创建管理员账户。"
-                "请运行 'python backend/create_admin.py' 手动创建"
-            )
-            return
+    # 严格验证用户名
+    username = (Config.INITIAL_ADMIN_USERNAME or '').strip()
+    if not username:
+        logger.error("INITIAL_ADMIN_USERNAME 为空,无法创建管理员")
+        return
+    if len(username) < 3 or len(username) > 50:
+        logger.error(
+            f"INITIAL_ADMIN_USERNAME 长度必须在 3-50 字符之间,"
+            f"当前长度: {len(username)}"
+        )
+        return
 
-        # 严格验证用户名
-        username = (Config.INITIAL_ADMIN_USERNAME or '').strip()
-        if not username:
-            logger.error("INITIAL_ADMIN_USERNAME 为空,无法创建管理员")
-            return
-        if len(username) < 3 or len(username) > 50:
-            logger.error(
-                f"INITIAL_ADMIN_USERNAME 长度必须在 3-50 字符之间,"
-                f"当前长度: {len(username)}"
-            )
-            return
+    # 严格验证邮箱
+    email = (Config.INITIAL_ADMIN_EMAIL or '').strip()
+    if not email:
+        logger.error("INITIAL_ADMIN_EMAIL 为空,无法创建管理员")
+        return
+    if not _EMAIL_RE.match(email):
+        logger.error(f"INITIAL_ADMIN_EMAIL 格式不正确: {email}")
+        return
 
-        # 严格验证邮箱
-        email = (Config.INITIAL_ADMIN_EMAIL or '').strip()
-        if not email:
-            logger.error("INITIAL_ADMIN_EMAIL 为空,无法创建管理员")
-            return
-        if '@' not in email or '.' not in email.split('@')[1]:
-            logger.error(f"INITIAL_ADMIN_EMAIL 格式不正确: {email}")
-            return
+    # 严格验证密码强度
+    password = Config.INITIAL_ADMIN_PASSWORD
+    if len(password) < 8:
+        logger.error(
+            "INITIAL_ADMIN_PASSWORD 太弱!密码长度至少为 8 个字符。"
+            "为确保安全,建议使用 12 位以上包含大小写字母、数字、符号的强密码"
+        )
+        return
 
-        # 严格验证密码强度
-        password = Config.INITIAL_ADMIN_PASSWORD
-        if len(password) < 8:
-            logger.error(
-                "INITIAL_ADMIN_PASSWORD 太弱!密码长度至少为 8 个字符。"
-                "为确保安全,建议使用 12 位以上包含大小写字母、数字、符号的强密码"
-            )
-            return
+    # 检查密码复杂度(建议至少包含3种字符类型)
+    # 单次遍历统计字符类型，四类都出现后提前结束
+    has_lower = has_upper = has_digit = has_special = False
+    for c in password:
+        if c.islower():
+            has_lower = True
+        elif c.isupper():
+            has_upper = True
+        elif c.isdigit():
+            has_digit = True
+        elif not c.isalnum():
+            has_special = True
+        if has_lower and has_upper and has_digit and has_special:
+            break
+    complexity = sum([has_lower, has_upper, has_digit, has_special])
+
+    if complexity < 2:
+        logger.error(
+            "INITIAL_ADMIN_PASSWORD 太简单!密码应至少包含以下2种:"
+            "小写字母、大写字母、数字、特殊符号"
+        )
+        return
 
-        # 检查密码复杂度(建议至少包含3种字符类型)
-        has_lower = any(c.islower() for c in password)
-        has_upper = any(c.isupper() for c in password)
-        has_digit = any(c.isdigit() for c in password)
-        has_special = any(not c.isalnum() for c in password)
-        complexity = sum([has_lower, has_upper, has_digit, has_special])
+    if complexity < 3:
+        logger.warning(
+            "INITIAL_ADMIN_PASSWORD 强度一般,建议包含大小写字母、数字和符号"
+        )
 
-        if complexity < 2:
-            logger.error(
-                "INITIAL_ADMIN_PASSWORD 太简单!密码应至少包含以下2种:"
-                "小写字母、大写字母、数字、特殊符号"
-            )
+    db = get_db()
+    try:
+        # 检查是否已存在管理员
+        existing_admin = db.execute(
+            sa.select(User.id).where(User.role == 'admin').limit(1)
+        ).first()
+        if existing_admin:
+            logger.info(f"系统中已存在管理员账户,跳过自动创建")
             return
 
-        if complexity < 3:
-            logger.warning(
-                "INITIAL_ADMIN_PASSWORD 强度一般,建议包含大小写字母、数字和符号"
-            )
+        # 一次查询同时检查用户名和邮箱是否已被占用
+        conflicts = db.execute(
+            sa.select(User.username, User.email, User.role)
+            .where(sa.or_(User.username == username, User.email == email))
+            .limit(2)
+        ).all()
 
-        # 检查用户名是否已被占用
-        existing_user = db.query(User).filter(
-            User.username == username
-        ).first()
+        existing_user = next((row for row in conflicts if row.username == username), None)
         if existing_user:
             logger.error(
                 f"用户名 '{username}' 已存在(角色: {existing_user.role})。"
@@ -217,11 +261,7 @@ def bootstrap_initial_admin():
             )
             return
 
-        # 检查邮箱是否已被占用
-        existing_email = db.query(User).filter(
-            User.email == email
-        ).first()
-        if existing_email:
+        if any(row.email == email for row in conflicts):
             logger.error(
                 f"邮箱 '{email}' 已被使用。无法创建管理员账户。"
                 f"解决方案: 修改 INITIAL_ADMIN_EMAIL 环境变量,"
@@ -231,6 +271,8 @@ def bootstrap_initial_admin():
 
         # 创建管理员账户
         logger.info("正在创建初始管理员账户...")
+        # 延迟导入：auth 依赖 bcrypt/jwt/flask，仅在确实需要创建管理员时加载
+        from backend.auth import hash_password
         password_hash = hash_password(password)
 
         admin_user = User(
@@ -242,8 +284,8 @@ def bootstrap_initial_admin():
         )
 
         db.add(admin_user)
+        # 会话配置了 expire_on_commit=False，提交后 ID 已回填，无需 refresh 再查一次
         db.commit()
-        db.refresh(admin_user)
 
         logger.info("=" * 60)
         logger.info("✅ 初始管理员账户创建成功!")
@@ -286,14 +328,17 @@ def main():
 
         # 创建表结构
         logger.info("正在创建数据库表...")
-        init_db()
+        with stage("create_all"):
+            init_db()
         logger.info("数据库表创建成功")
 
         # 创建默认角色和权限
-        create_default_roles_and_permissions()
+        with stage("roles_permissions"):
+            create_default_roles_and_permissions()
 
         # 自动创建初始管理员账户
-        bootstrap_initial_admin()
+        with stage("admin_bootstrap"):
+            bootstrap_initial_admin()
 
         logger.info("=" * 60)
         logger.info("数据库初始化完成！")
@@ -3,17 +3,22 @@
 
 将旧的 JSON 文件历史记录迁移到数据库
 """
-import json
+import io
 import logging
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+import sqlalchemy as sa
+
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.db import get_db
 from backend.models import HistoryRecord
+from backend.utils import fast_json
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,6 +26,71 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 每批插入的记录数
+INSERT_BATCH_SIZE = 1000
+# PostgreSQL 使用 COPY 导入时每批的记录数
+COPY_BATCH_SIZE = 10000
+# 并发读取记录文件的线程数
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# COPY 导入的列顺序（与 batch 中的字典键一致）
+COPY_COLUMNS = (
+    'record_uuid', 'user_id', 'client_id', 'title', 'status', 'thumbnail_url',
+    'page_count', 'outline_raw', 'outline_json', 'images_json', 'image_task_id',
+    'created_at', 'updated_at',
+)
+JSON_COLUMNS = frozenset(('outline_json', 'images_json'))
+
+
+def _copy_text_value(column: str, value) -> str:
+    """将单个值编码为 COPY text 格式的字段"""
+    if value is None:
+        return '\\N'
+    if column in JSON_COLUMNS:
+        value = fast_json.dumps(value).decode('utf-8')
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return (
+        value.replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def _supports_copy(db) -> bool:
+    """当前连接是否可以使用 PostgreSQL COPY（需要 psycopg2 或 psycopg 3 驱动）"""
+    dialect = db.get_bind().dialect
+    return dialect.name == 'postgresql' and dialect.driver in ('psycopg2', 'psycopg')
+
+
+def _copy_history_rows(db, rows: list) -> None:
+    """
+    通过 COPY FROM STDIN 批量导入记录（PostgreSQL），比逐批 INSERT 快得多
+
+    Args:
+        db: 数据库会话（COPY 在会话当前事务内执行）
+        rows: 记录字典列表
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_text_value(col, row[col]) for col in COPY_COLUMNS))
+        buffer.write('\n')
+
+    sql = f"COPY {HistoryRecord.__tablename__} ({', '.join(COPY_COLUMNS)}) FROM STDIN"
+    cursor = db.connection().connection.driver_connection.cursor()
+    try:
+        if hasattr(cursor, 'copy_expert'):  # psycopg2
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
 
 def migrate_history_records():
     """迁移历史记录"""
@@ -33,8 +103,7 @@ def migrate_history_records():
 
     # 读取索引文件
     try:
-        with open(index_file, 'r', encoding='utf-8') as f:
-            index_data = json.load(f)
+        index_data = fast_json.loads(index_file.read_bytes())
     except Exception as e:
         logger.error(f"读取索引文件失败: {e}")
         return 0
@@ -49,8 +118,32 @@ def migrate_history_records():
     db = get_db()
     migrated_count = 0
     skipped_count = 0
+    batch = []
 
     try:
+        use_copy = _supports_copy(db)
+        batch_size = COPY_BATCH_SIZE if use_copy else INSERT_BATCH_SIZE
+
+        def flush_batch():
+            if use_copy:
+                _copy_history_rows(db, batch)
+            else:
+                db.execute(sa.insert(HistoryRecord), batch)
+            batch.clear()
+
+        # 按索引中的 ID 分批查询已迁移的记录，替代逐条查询
+        candidate_ids = [meta.get('id') for meta in records if meta.get('id')]
+        existing_uuids = set()
+        for start in range(0, len(candidate_ids), INSERT_BATCH_SIZE):
+            chunk = candidate_ids[start:start + INSERT_BATCH_SIZE]
+            existing_uuids.update(db.execute(
+                sa.select(HistoryRecord.record_uuid).where(
+                    HistoryRecord.record_uuid.in_(chunk)
+                )
+            ).scalars())
+
+        # 先在主线程筛选出待迁移的记录 ID
+        pending_ids = []
         for record_meta in records:
             record_id = record_meta.get('id')
             if not record_id:
@@ -58,69 +151,74 @@ def migrate_history_records():
                 skipped_count += 1
                 continue
 
-            # 检查是否已迁移
-            existing = db.query(HistoryRecord).filter(
-                HistoryRecord.record_uuid == record_id
-            ).first()
-
-            if existing:
+            # 检查是否已迁移（同时过滤索引中的重复 ID，防止唯一约束冲突）
+            if record_id in existing_uuids:
                 logger.debug(f"记录 {record_id} 已存在，跳过")
                 skipped_count += 1
                 continue
 
-            # 读取完整记录
+            existing_uuids.add(record_id)
+            pending_ids.append(record_id)
+
+        def read_record_file(record_id: str):
+            """读取单个记录文件，返回 (record_id, 记录数据或 None)"""
             record_file = history_dir / f"{record_id}.json"
             if not record_file.exists():
                 logger.warning(f"记录文件不存在: {record_file}")
-                skipped_count += 1
-                continue
-
+                return record_id, None
             try:
-                with open(record_file, 'r', encoding='utf-8') as f:
-                    record_data = json.load(f)
+                return record_id, fast_json.loads(record_file.read_bytes())
             except Exception as e:
                 logger.error(f"读取记录文件失败 {record_file}: {e}")
-                skipped_count += 1
-                continue
-
-            # 解析数据
-            title = record_data.get('title', '未命名')
-            status = record_data.get('status', 'draft')
-            outline = record_data.get('outline', {})
-            images = record_data.get('images', {})
-            created_at_str = record_data.get('created_at')
-            updated_at_str = record_data.get('updated_at')
-
-            # 解析时间
-            try:
-                created_at = datetime.fromisoformat(created_at_str) if created_at_str else datetime.now()
-                updated_at = datetime.fromisoformat(updated_at_str) if updated_at_str else created_at
-            except Exception:
-                created_at = datetime.now()
-                updated_at = created_at
-
-            # 创建数据库记录
-            db_record = HistoryRecord(
-                record_uuid=record_id,
-                user_id=None,  # 遗留数据，无用户关联
-                client_id=None,  # 旧数据没有 client_id
-                title=title,
-                status=status,
-                thumbnail_url=record_data.get('thumbnail'),
-                page_count=len(outline.get('pages', [])),
-                outline_raw=outline.get('raw'),
-                outline_json=outline,
-                images_json=images,
-                image_task_id=images.get('task_id'),
-                created_at=created_at,
-                updated_at=updated_at,
-            )
-
-            db.add(db_record)
-            migrated_count += 1
-
-            if migrated_count % 10 == 0:
-                logger.info(f"已迁移 {migrated_count} 条记录...")
+                return record_id, None
+
+        # 并发读取记录文件（I/O 密集），数据库写入仍在主线程完成（Session 非线程安全）
+        with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+            for record_id, record_data in executor.map(read_record_file, pending_ids):
+                if record_data is None:
+                    skipped_count += 1
+                    continue
+
+                # 解析数据
+                title = record_data.get('title', '未命名')
+                status = record_data.get('status', 'draft')
+                outline = record_data.get('outline', {})
+                images = record_data.get('images', {})
+                created_at_str = record_data.get('created_at')
+                updated_at_str = record_data.get('updated_at')
+
+                # 解析时间
+                try:
+                    created_at = datetime.fromisoformat(created_at_str) if created_at_str else datetime.now()
+                    updated_at = datetime.fromisoformat(updated_at_str) if updated_at_str else created_at
+                except Exception:
+                    created_at = datetime.now()
+                    updated_at = created_at
+
+                # 构造数据库记录（批量插入）
+                batch.append({
+                    'record_uuid': record_id,
+                    'user_id': None,  # 遗留数据，无用户关联
+                    'client_id': None,  # 旧数据没有 client_id
+                    'title': title,
+                    'status': status,
+                    'thumbnail_url': record_data.get('thumbnail'),
+                    'page_count': len(outline.get('pages', [])),
+                    'outline_raw': outline.get('raw'),
+                    'outline_json': outline,
+                    'images_json': images,
+                    'image_task_id': images.get('task_id'),
+                    'created_at': created_at,
+                    'updated_at': updated_at,
+                })
+                migrated_count += 1
+
+                if len(batch) >= batch_size:
+                    flush_batch()
+                    logger.info(f"已迁移 {migrated_count} 条记录...")
+
+        if batch:
+            flush_batch()
 
         # 提交所有更改
         db.commit()
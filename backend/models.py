@@ -8,10 +8,63 @@ from datetime import datetime, timezone
 from typing import Optional
 
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from backend.db import Base
 
+# JSON 列类型：PostgreSQL 上使用二进制存储的 JSONB（读取无需重新解析），其他数据库保持 JSON
+JSONType = sa.JSON().with_variant(JSONB(), "postgresql")
+
+
+def _pg_trgm_available(ddl, target, bind, **kw) -> bool:
+    """pg_trgm 扩展不可用（如数据库账号无建扩展权限）时跳过 trigram 索引"""
+    # 仅编译 DDL（无连接）时照常输出
+    return bind is None or "pg_trgm" in bind.info.get("available_extensions", ())
+
+
+def trigram_index(name: str, column: str) -> sa.Index:
+    """
+    PostgreSQL pg_trgm GIN 索引，使 ILIKE '%关键词%' 模糊搜索可以走索引
+
+    仅在 PostgreSQL 且 pg_trgm 扩展可用时创建
+    （info 中的 dialect/extension 供 init_db 补建索引时过滤）
+    """
+    return sa.Index(
+        name,
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+        info={"dialect": "postgresql", "extension": "pg_trgm"},
+    ).ddl_if(dialect="postgresql", callable_=_pg_trgm_available)
+
+
+# SQLite 游标分页使用的时间文本格式（%f 为带 3 位小数的秒）
+SQLITE_SORTABLE_TS_FORMAT = "%Y-%m-%d %H:%M:%f"
+
+
+def sqlite_sortable_ts(expr):
+    """
+    SQLite 上将时间列格式化为统一精度的可排序文本
+
+    SQLite 以文本存储时间：服务端默认值不带小数秒，ORM 写入的值带微秒，直接按文本比较会错位。
+    格式串以字面量内联（而非绑定参数），使查询表达式与 sqlite_sortable_index 一致从而可以走索引
+    """
+    return sa.func.strftime(sa.literal_column(f"'{SQLITE_SORTABLE_TS_FORMAT}'"), expr)
+
+
+def sqlite_sortable_index(name: str, column: str) -> sa.Index:
+    """
+    SQLite 表达式索引，使按 sqlite_sortable_ts 排序/定位的游标分页可以走索引
+
+    仅在 SQLite 上创建（info 中的 dialect 供 init_db 补建索引时过滤）
+    """
+    return sa.Index(
+        name,
+        sa.text(f"strftime('{SQLITE_SORTABLE_TS_FORMAT}', {column})"),
+        info={"dialect": "sqlite"},
+    ).ddl_if(dialect="sqlite")
+
 
 # ============================================================================
 # 用户与认证
@@ -89,6 +142,20 @@ class User(Base):
     usage_events = relationship("UsageEvent", back_populates="user", cascade="all, delete-orphan")
     refresh_tokens = relationship("RefreshToken", back_populates="user", cascade="all, delete-orphan")
 
+    # 复合索引（按角色查找管理员、检查是否存在其他启用的管理员）
+    __table_args__ = (
+        sa.Index("idx_users_role_active", "role", "is_active"),
+        # 后台用户名/邮箱模糊搜索
+        trigram_index("idx_users_username_trgm", "username"),
+        trigram_index("idx_users_email_trgm", "email"),
+        # SQLite 后台用户列表游标分页
+        sqlite_sortable_index("idx_users_created_sortable", "created_at"),
+    )
+
+    # 插入/更新后立即取回服务端生成的 created_at/updated_at（支持 RETURNING 的数据库随语句返回），
+    # 调用方无需再 refresh
+    __mapper_args__ = {"eager_defaults": True}
+
     def __repr__(self) -> str:
         return f"<User(id={self.id}, username='{self.username}', role='{self.role}')>"
 
@@ -203,15 +270,15 @@ class HistoryRecord(Base):
         comment="原始大纲文本"
     )
     outline_json: Mapped[Optional[dict]] = mapped_column(
-        sa.JSON,
+        JSONType,
         comment="结构化大纲数据"
     )
     images_json: Mapped[Optional[dict]] = mapped_column(
-        sa.JSON,
+        JSONType,
         comment="图片数据（task_id, generated 等）"
     )
     user_images_json: Mapped[Optional[dict]] = mapped_column(
-        sa.JSON,
+        JSONType,
         comment="用户上传的参考图片（base64 编码列表）"
     )
     image_task_id: Mapped[Optional[str]] = mapped_column(
@@ -242,6 +309,10 @@ class HistoryRecord(Base):
     __table_args__ = (
         sa.Index("idx_history_user_created", "user_id", "created_at"),
         sa.Index("idx_history_user_status", "user_id", "status"),
+        # 后台标题关键词搜索
+        trigram_index("idx_history_title_trgm", "title"),
+        # SQLite 后台记录列表游标分页
+        sqlite_sortable_index("idx_history_created_sortable", "created_at"),
     )
 
     def __repr__(self) -> str:
@@ -297,6 +368,10 @@ class ImageFile(Base):
     # 复合索引
     __table_args__ = (
         sa.Index("idx_image_files_user_created", "user_id", "created_at"),
+        # 后台按记录筛选图片并按时间排序
+        sa.Index("idx_image_files_record_created", "record_id", "created_at"),
+        # SQLite 后台图片列表游标分页
+        sqlite_sortable_index("idx_image_files_created_sortable", "created_at"),
     )
 
     def __repr__(self) -> str:
@@ -332,7 +407,7 @@ class UsageEvent(Base):
         comment="数量（如生成图片张数）"
     )
     meta: Mapped[Optional[dict]] = mapped_column(
-        sa.JSON,
+        JSONType,
         comment="元数据（模型名、prompt 长度等）"
     )
     created_at: Mapped[datetime] = mapped_column(
@@ -578,7 +653,7 @@ class AuditLog(Base):
         comment="资源 ID"
     )
     details: Mapped[Optional[dict]] = mapped_column(
-        sa.JSON,
+        JSONType,
         comment="操作详情（JSON 格式）"
     )
     ip_address: Mapped[Optional[str]] = mapped_column(
@@ -597,7 +672,10 @@ class AuditLog(Base):
     __table_args__ = (
         sa.Index("idx_audit_logs_actor_created", "actor_id", "created_at"),
         sa.Index("idx_audit_logs_action_created", "action", "created_at"),
+        sa.Index("idx_audit_logs_resource_type_created", "resource_type", "created_at"),
         sa.Index("idx_audit_logs_resource", "resource_type", "resource_id"),
+        # SQLite 审计日志游标分页
+        sqlite_sortable_index("idx_audit_logs_created_sortable", "created_at"),
     )
 
     def __repr__(self) -> str:
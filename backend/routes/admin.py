@@ -4,20 +4,25 @@
 提供用户管理、生成记录管理、图片管理、配置管理、注册开关等功能
 所有端点均需要管理员权限
 """
-import io
+import base64
 import os
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from operator import attrgetter
 from pathlib import Path
 from typing import Optional, Any
 
 import yaml
-from flask import Blueprint, request, jsonify, g
-from sqlalchemy import func, or_
-from sqlalchemy.orm import joinedload
+from flask import Blueprint, Response, request, g
+from sqlalchemy import BigInteger, and_, case, cast, delete, func, literal, or_, select, true
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer, joinedload, load_only
 
 from backend.auth import admin_required, get_current_user, hash_password
-from backend.db import get_db
+from backend.db import close_db, get_db
 from backend.models import (
     User,
     HistoryRecord,
@@ -25,30 +30,83 @@ from backend.models import (
     ConfigVersion,
     RegistrationSetting,
     AuditLog,
+    sqlite_sortable_ts,
 )
 from backend.config import Config
+from backend.services.audit import get_audit_log_writer
+from backend.utils import fast_json, fast_yaml
 
 logger = logging.getLogger(__name__)
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
 
+# 批量删除图片文件时的最大并发线程数
+UNLINK_MAX_WORKERS = 16
+
+
+@admin_bp.before_request
+def _open_request_db() -> None:
+    """为每个请求创建一个数据库会话，处理函数通过 g.db 共用"""
+    g.db = get_db()
+
+
+@admin_bp.teardown_request
+def _close_request_db(exc: Optional[BaseException] = None) -> None:
+    """请求结束时关闭并移除线程本地会话（未提交的修改会被回滚，处理函数需显式 commit）"""
+    if g.pop("db", None) is not None:
+        close_db()
+
 
 # ============================================================================
 # 工具函数
 # ============================================================================
 
-def _json_success(data: Any = None, **kwargs) -> tuple:
+def _json_response(payload: dict, status: int = 200) -> Response:
+    """
+    构造 JSON 响应
+
+    直接序列化为 bytes（优先 orjson），datetime 字段无需预先转换为字符串
+    """
+    return Response(fast_json.dumps(payload), status=status, mimetype="application/json")
+
+
+def _json_success(data: Any = None, status: int = 200, **kwargs) -> Response:
     """返回成功响应"""
     response = {"success": True}
     if data is not None:
         response["data"] = data
     response.update(kwargs)
-    return jsonify(response), 200
+    return _json_response(response, status)
 
 
-def _json_error(message: str, status: int = 400) -> tuple:
+def _json_error(message: str, status: int = 400) -> Response:
     """返回错误响应"""
-    return jsonify({"success": False, "error": message}), status
+    return _json_response({"success": False, "error": message}, status)
+
+
+def _json_stream_items(items: list, serialize, **kwargs) -> Response:
+    """
+    流式返回列表响应，逐条序列化并发送，不在内存中拼出完整响应体
+
+    响应结构与 _json_success(items=[...], **kwargs) 相同
+
+    Args:
+        items: 已查询出的对象列表
+        serialize: 单个对象转字典的函数（只能访问已加载的属性，生成器执行时会话可能已关闭）
+        **kwargs: 附加的顶层字段（如分页信息）
+    """
+    def generate():
+        yield b'{"success":true,"items":['
+        separator = b""
+        for item in items:
+            yield separator + fast_json.dumps(serialize(item))
+            separator = b","
+        yield b"]"
+        for key, value in kwargs.items():
+            yield b"," + fast_json.dumps(key) + b":" + fast_json.dumps(value)
+        yield b"}"
+
+    return Response(generate(), mimetype="application/json")
 
 
 def _get_pagination_params() -> tuple:
@@ -60,6 +118,84 @@ def _get_pagination_params() -> tuple:
     return page, page_size
 
 
+def _paginate(query, page: int, page_size: int) -> tuple:
+    """
+    分页查询，总数通过窗口函数 COUNT(*) OVER () 随当前页一起返回
+
+    相比先 count() 再查询当前页，只需一次查询、筛选条件只计算一次
+
+    Args:
+        query: 已设置筛选和排序的 ORM 查询
+        page: 页码（从 1 开始）
+        page_size: 每页数量
+
+    Returns:
+        tuple: (当前页对象列表, 总数)；列投影查询时列表元素为列值元组
+    """
+    rows = (
+        query.add_columns(func.count().over().label("_total"))
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .all()
+    )
+    if rows:
+        if len(query.column_descriptions) == 1:
+            return [row[0] for row in rows], rows[0][-1]
+        return [row[:-1] for row in rows], rows[0][-1]
+    # 当前页为空时窗口函数无结果行；页码超出末页时单独统计总数
+    return [], query.order_by(None).count() if page > 1 else 0
+
+
+def _encode_cursor(obj) -> str:
+    """将对象的 (created_at, id) 编码为不透明的游标字符串（URL 安全）"""
+    raw = f"{obj.created_at.isoformat()},{obj.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _keyset_paginate(query, model, desc: bool, cursor: str, page_size: int) -> tuple:
+    """
+    游标（keyset）分页，按 (created_at, id) 定位上一页末尾
+
+    与 OFFSET 分页不同，深分页时数据库无需扫描并丢弃前面的行，可直接利用 created_at 索引
+    （SQLite 上利用 sqlite_sortable_index 表达式索引）
+
+    Args:
+        query: 已设置筛选条件的 ORM 查询（原有排序会被替换）
+        model: 查询的模型类（需包含 created_at 和 id 列）
+        desc: 是否按时间降序
+        cursor: 上一页返回的 next_cursor，空字符串表示从第一页开始
+        page_size: 每页数量
+
+    Returns:
+        tuple: (当前页对象列表, 下一页游标；没有更多数据时为 None)
+
+    Raises:
+        ValueError: cursor 格式不正确
+    """
+    created_at, pk = model.created_at, model.id
+    # SQLite 以文本存储时间，排序和定位都统一格式化为毫秒精度的文本
+    is_sqlite = query.session.get_bind().dialect.name == "sqlite"
+    sort_key = sqlite_sortable_ts(created_at) if is_sqlite else created_at
+    if cursor:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        ts_str, _, id_str = raw.rpartition(",")
+        last_ts = datetime.fromisoformat(ts_str)
+        last_id = int(id_str)
+        if is_sqlite:
+            last_ts = sqlite_sortable_ts(literal(last_ts, created_at.type))
+        if desc:
+            query = query.filter(or_(sort_key < last_ts, and_(sort_key == last_ts, pk < last_id)))
+        else:
+            query = query.filter(or_(sort_key > last_ts, and_(sort_key == last_ts, pk > last_id)))
+
+    order = (sort_key.desc(), pk.desc()) if desc else (sort_key.asc(), pk.asc())
+    # 多取一条用于判断是否还有下一页
+    items = query.order_by(None).order_by(*order).limit(page_size + 1).all()
+    if len(items) > page_size:
+        return items[:page_size], _encode_cursor(items[page_size - 1])
+    return items, None
+
+
 def _parse_iso8601(date_str: str) -> Optional[datetime]:
     """
     解析 ISO8601 格式的日期时间字符串
@@ -94,51 +230,70 @@ def _parse_iso8601(date_str: str) -> Optional[datetime]:
         return None
 
 
+# 列表序列化字段（attrgetter 一次取出全部字段，避免逐个属性访问）
+_USER_FIELDS = (
+    "id", "uuid", "username", "email", "role", "is_active", "client_id",
+    "created_at", "updated_at", "last_login_at",
+)
+_RECORD_FIELDS = (
+    "id", "record_uuid", "user_id", "client_id", "title", "status", "thumbnail_url",
+    "page_count", "image_task_id", "created_at", "updated_at",
+)
+_IMAGE_FIELDS = (
+    "id", "user_id", "record_id", "task_id", "filename", "file_size", "created_at",
+)
+_AUDIT_LOG_FIELDS = (
+    "id", "actor_id", "actor_username", "action", "resource_type", "resource_id",
+    "details", "ip_address", "created_at",
+)
+# 列表查询只加载需要序列化的列（跳过 password_hash、大纲/图片 JSON 等大字段）
+_USER_LIST_COLUMNS = load_only(*(getattr(User, f) for f in _USER_FIELDS))
+_RECORD_LIST_COLUMNS = load_only(*(getattr(HistoryRecord, f) for f in _RECORD_FIELDS))
+# 列表允许排序的字段白名单（仅限普通列，避免对关系属性排序）
+_USER_SORT_COLUMNS = {
+    "id": User.id,
+    "username": User.username,
+    "email": User.email,
+    "role": User.role,
+    "is_active": User.is_active,
+    "created_at": User.created_at,
+    "updated_at": User.updated_at,
+    "last_login_at": User.last_login_at,
+}
+_RECORD_SORT_COLUMNS = {
+    "id": HistoryRecord.id,
+    "title": HistoryRecord.title,
+    "status": HistoryRecord.status,
+    "page_count": HistoryRecord.page_count,
+    "created_at": HistoryRecord.created_at,
+    "updated_at": HistoryRecord.updated_at,
+}
+_IMAGE_SORT_COLUMNS = {
+    "id": ImageFile.id,
+    "filename": ImageFile.filename,
+    "file_size": ImageFile.file_size,
+    "created_at": ImageFile.created_at,
+}
+_get_user_fields = attrgetter(*_USER_FIELDS)
+_get_record_fields = attrgetter(*_RECORD_FIELDS)
+_get_image_fields = attrgetter(*_IMAGE_FIELDS)
+
+
 def _user_to_dict(user: User) -> dict:
     """将用户对象转换为字典"""
-    return {
-        "id": user.id,
-        "uuid": user.uuid,
-        "username": user.username,
-        "email": user.email,
-        "role": user.role,
-        "is_active": user.is_active,
-        "client_id": user.client_id,
-        "created_at": user.created_at.isoformat() if user.created_at else None,
-        "updated_at": user.updated_at.isoformat() if user.updated_at else None,
-        "last_login_at": user.last_login_at.isoformat() if user.last_login_at else None,
-    }
+    return dict(zip(_USER_FIELDS, _get_user_fields(user)))
 
 
 def _record_to_dict(record: HistoryRecord) -> dict:
     """将历史记录对象转换为字典"""
-    return {
-        "id": record.id,
-        "record_uuid": record.record_uuid,
-        "user_id": record.user_id,
-        "client_id": record.client_id,
-        "title": record.title,
-        "status": record.status,
-        "thumbnail_url": record.thumbnail_url,
-        "page_count": record.page_count,
-        "image_task_id": record.image_task_id,
-        "created_at": record.created_at.isoformat() if record.created_at else None,
-        "updated_at": record.updated_at.isoformat() if record.updated_at else None,
-    }
+    return dict(zip(_RECORD_FIELDS, _get_record_fields(record)))
 
 
 def _image_to_dict(image: ImageFile) -> dict:
     """将图片文件对象转换为字典"""
-    return {
-        "id": image.id,
-        "user_id": image.user_id,
-        "record_id": image.record_id,
-        "task_id": image.task_id,
-        "filename": image.filename,
-        "file_size": image.file_size,
-        "created_at": image.created_at.isoformat() if image.created_at else None,
-        "user": {"username": image.user.username} if getattr(image, "user", None) else None,
-    }
+    data = dict(zip(_IMAGE_FIELDS, _get_image_fields(image)))
+    data["user"] = {"username": image.user.username} if getattr(image, "user", None) else None
+    return data
 
 
 def _audit_log(
@@ -147,37 +302,53 @@ def _audit_log(
     resource_id: Optional[str] = None,
     details: Optional[dict] = None
 ) -> None:
-    """记录审计日志"""
-    db = get_db()
+    """记录审计日志（入队后由后台线程批量写入，不占用当前请求的事务）"""
     try:
         user = get_current_user()
-        log = AuditLog(
-            actor_id=user.id if user else None,
-            actor_username=user.username if user else None,
-            action=action,
-            resource_type=resource_type,
-            resource_id=str(resource_id) if resource_id is not None else None,
-            details=details,
-            ip_address=request.remote_addr,
-        )
-        db.add(log)
-        db.commit()
+        get_audit_log_writer().submit({
+            "actor_id": user.id if user else None,
+            "actor_username": user.username if user else None,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": str(resource_id) if resource_id is not None else None,
+            "details": details,
+            "ip_address": request.remote_addr,
+            # 入队时记录时间，避免批量写入延迟影响操作时间
+            "created_at": datetime.now(timezone.utc),
+        })
     except Exception as e:
         logger.error(f"记录审计日志失败: {e}")
-        db.rollback()
-    finally:
-        db.close()
+
+
+def _unique_conflict_message(e: IntegrityError) -> Optional[str]:
+    """
+    根据唯一约束冲突的数据库错误信息判断冲突字段
+
+    兼容 SQLite（users.username）、MySQL/PostgreSQL（索引名 ix_users_username）的错误格式
+
+    Returns:
+        Optional[str]: 面向用户的错误信息，非用户名/邮箱冲突时返回 None
+    """
+    message = str(e.orig).lower()
+    if "users.username" in message or "ix_users_username" in message:
+        return "用户名已被使用"
+    if "users.email" in message or "ix_users_email" in message:
+        return "邮箱已被使用"
+    return None
 
 
 def _is_last_admin(user: User, db) -> bool:
-    """检查是否是唯一的管理员"""
+    """检查是否是唯一的管理员（即不存在其他启用的管理员）"""
     if user.role != "admin":
         return False
-    admin_count = db.query(User).filter(
-        User.role == "admin",
-        User.is_active == True
-    ).count()
-    return admin_count <= 1
+    other_admin_exists = db.query(
+        db.query(User).filter(
+            User.role == "admin",
+            User.is_active == True,
+            User.id != user.id,
+        ).exists()
+    ).scalar()
+    return not other_admin_exists
 
 
 # ============================================================================
@@ -198,48 +369,54 @@ def list_users():
         role: 角色筛选
         status: 状态筛选（active/inactive）
         sort: 排序字段，默认 -created_at（负号表示降序）
+        cursor: 游标分页（可选，空值表示第一页，之后传入上次返回的 next_cursor）
     """
     try:
         page, page_size = _get_pagination_params()
 
-        db = get_db()
-        try:
-            query = db.query(User)
-
-            # 筛选条件
-            if username := request.args.get("username"):
-                query = query.filter(User.username.ilike(f"%{username}%"))
-            if email := request.args.get("email"):
-                query = query.filter(User.email.ilike(f"%{email}%"))
-            if role := request.args.get("role"):
-                query = query.filter(User.role == role)
-            if status := request.args.get("status"):
-                query = query.filter(User.is_active == (status == "active"))
-
-            # 排序
-            sort = request.args.get("sort", "-created_at")
-            desc = sort.startswith("-")
-            sort_field = sort[1:] if desc else sort
-            if hasattr(User, sort_field):
-                col = getattr(User, sort_field)
-                query = query.order_by(col.desc() if desc else col.asc())
-
-            # 统计总数
-            total = query.count()
-            pages = (total + page_size - 1) // page_size  # 向上取整计算总页数
-
-            # 分页
-            offset = (page - 1) * page_size
-            users = query.offset(offset).limit(page_size).all()
-
-            return _json_success(
-                items=[_user_to_dict(u) for u in users],
-                page=page,
-                pages=pages,
-                total=total,
-            )
-        finally:
-            db.close()
+        db = g.db
+        query = db.query(User).options(_USER_LIST_COLUMNS)
+
+        # 筛选条件
+        if username := request.args.get("username"):
+            query = query.filter(User.username.ilike(f"%{username}%"))
+        if email := request.args.get("email"):
+            query = query.filter(User.email.ilike(f"%{email}%"))
+        if role := request.args.get("role"):
+            query = query.filter(User.role == role)
+        if status := request.args.get("status"):
+            query = query.filter(User.is_active == (status == "active"))
+
+        # 排序
+        sort = request.args.get("sort", "-created_at")
+        desc = sort.startswith("-")
+        sort_field = sort[1:] if desc else sort
+        col = _USER_SORT_COLUMNS.get(sort_field)
+        if col is not None:
+            query = query.order_by(col.desc() if desc else col.asc())
+
+        # 游标分页（传入 cursor 参数时启用，仅支持按 created_at 排序）
+        if "cursor" in request.args:
+            if sort_field != "created_at":
+                return _json_error("cursor 分页仅支持按 created_at 排序")
+            try:
+                users, next_cursor = _keyset_paginate(
+                    query, User, desc, request.args["cursor"], page_size
+                )
+            except ValueError:
+                return _json_error("cursor 参数格式不正确")
+            return _json_success(items=[_user_to_dict(u) for u in users], next_cursor=next_cursor)
+
+        # 分页（总数与当前页在同一次查询中返回）
+        users, total = _paginate(query, page, page_size)
+        pages = (total + page_size - 1) // page_size  # 向上取整计算总页数
+
+        return _json_success(
+            items=[_user_to_dict(u) for u in users],
+            page=page,
+            pages=pages,
+            total=total,
+        )
 
     except Exception as e:
         logger.error(f"获取用户列表失败: {e}", exc_info=True)
@@ -251,14 +428,11 @@ def list_users():
 def get_user(user_id: int):
     """获取用户详情"""
     try:
-        db = get_db()
-        try:
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user:
-                return _json_error("用户不存在", 404)
-            return _json_success(data=_user_to_dict(user))
-        finally:
-            db.close()
+        db = g.db
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return _json_error("用户不存在", 404)
+        return _json_success(data=_user_to_dict(user))
 
     except Exception as e:
         logger.error(f"获取用户详情失败: {e}", exc_info=True)
@@ -300,38 +474,29 @@ def create_user():
         if role not in ("user", "admin", "pro"):
             return _json_error("角色必须是 user、admin 或 pro")
 
-        db = get_db()
+        db = g.db
+        # 创建用户（用户名/邮箱唯一性由数据库唯一约束保证）
+        user = User(
+            username=username,
+            email=email,
+            password_hash=hash_password(password),
+            role=role,
+            is_active=is_active,
+        )
+        db.add(user)
         try:
-            # 检查用户名是否已存在
-            if db.query(User).filter(User.username == username).first():
-                return _json_error("用户名已被使用")
-
-            # 检查邮箱是否已存在
-            if email and db.query(User).filter(User.email == email).first():
-                return _json_error("邮箱已被使用")
-
-            # 创建用户
-            user = User(
-                username=username,
-                email=email,
-                password_hash=hash_password(password),
-                role=role,
-                is_active=is_active,
-            )
-            db.add(user)
             db.commit()
-            db.refresh(user)
-
-            # 记录审计日志
-            _audit_log("create_user", "user", user.id, {"username": username, "role": role})
+        except IntegrityError as e:
+            db.rollback()
+            message = _unique_conflict_message(e)
+            if message:
+                return _json_error(message)
+            raise
 
-            return jsonify({
-                "success": True,
-                "data": _user_to_dict(user)
-            }), 201
+        # 记录审计日志
+        _audit_log("create_user", "user", user.id, {"username": username, "role": role})
 
-        finally:
-            db.close()
+        return _json_success(data=_user_to_dict(user), status=201)
 
     except Exception as e:
         logger.error(f"创建用户失败: {e}", exc_info=True)
@@ -356,61 +521,67 @@ def update_user(user_id: int):
     try:
         data = request.get_json() or {}
 
-        db = get_db()
-        try:
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user:
-                return _json_error("用户不存在", 404)
-
-            # 防止降级或禁用唯一管理员
-            if _is_last_admin(user, db):
-                if "role" in data and data["role"] != "admin":
-                    return _json_error("禁止降级唯一管理员")
-                if "is_active" in data and not data["is_active"]:
-                    return _json_error("禁止禁用唯一管理员")
-
-            # 更新字段
-            changes = {}
-            if "username" in data:
-                username = (data["username"] or "").strip()
-                if username and username != user.username:
-                    if db.query(User).filter(User.username == username, User.id != user_id).first():
-                        return _json_error("用户名已被使用")
-                    user.username = username
-                    changes["username"] = username
-
-            if "email" in data:
-                email = (data["email"] or "").strip() or None
-                if email != user.email:
-                    if email and db.query(User).filter(User.email == email, User.id != user_id).first():
-                        return _json_error("邮箱已被使用")
-                    user.email = email
-                    changes["email"] = email
-
-            if "password" in data and data["password"]:
-                user.password_hash = hash_password(data["password"])
-                changes["password"] = "***已重置***"
-
-            if "role" in data:
-                if data["role"] not in ("user", "admin", "pro"):
-                    return _json_error("角色必须是 user、admin 或 pro")
+        db = g.db
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return _json_error("用户不存在", 404)
+
+        # 防止降级或禁用唯一管理员
+        if _is_last_admin(user, db):
+            if "role" in data and data["role"] != "admin":
+                return _json_error("禁止降级唯一管理员")
+            if "is_active" in data and not data["is_active"]:
+                return _json_error("禁止禁用唯一管理员")
+
+        # 更新字段
+        changes = {}
+        if "username" in data:
+            username = (data["username"] or "").strip()
+            if username and username != user.username:
+                user.username = username
+                changes["username"] = username
+
+        if "email" in data:
+            email = (data["email"] or "").strip() or None
+            if email != user.email:
+                user.email = email
+                changes["email"] = email
+
+        if "password" in data and data["password"]:
+            user.password_hash = hash_password(data["password"])
+            changes["password"] = "***已重置***"
+
+        if "role" in data:
+            if data["role"] not in ("user", "admin", "pro"):
+                return _json_error("角色必须是 user、admin 或 pro")
+            if data["role"] != user.role:
                 user.role = data["role"]
                 changes["role"] = data["role"]
 
-            if "is_active" in data:
-                user.is_active = bool(data["is_active"])
-                changes["is_active"] = user.is_active
+        if "is_active" in data:
+            is_active = bool(data["is_active"])
+            if is_active != user.is_active:
+                user.is_active = is_active
+                changes["is_active"] = is_active
 
-            db.commit()
-            db.refresh(user)
+        # 没有任何字段变化（如前端重复提交完整表单）：无需提交事务和记录审计日志
+        if not changes:
+            return _json_success(data=_user_to_dict(user))
 
-            # 记录审计日志
-            _audit_log("update_user", "user", user_id, changes)
+        # 用户名/邮箱冲突由唯一约束在提交时检测
+        try:
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            message = _unique_conflict_message(e)
+            if message:
+                return _json_error(message)
+            raise
 
-            return _json_success(data=_user_to_dict(user))
+        # 记录审计日志
+        _audit_log("update_user", "user", user_id, changes)
 
-        finally:
-            db.close()
+        return _json_success(data=_user_to_dict(user))
 
     except Exception as e:
         logger.error(f"更新用户失败: {e}", exc_info=True)
@@ -433,32 +604,27 @@ def toggle_user_status(user_id: int):
         if "is_active" not in data:
             return _json_error("缺少 is_active 参数")
 
-        db = get_db()
-        try:
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user:
-                return _json_error("用户不存在", 404)
-
-            # 防止禁用唯一管理员
-            if _is_last_admin(user, db) and not data["is_active"]:
-                return _json_error("禁止禁用唯一管理员")
+        db = g.db
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return _json_error("用户不存在", 404)
 
-            user.is_active = bool(data["is_active"])
-            db.commit()
-            db.refresh(user)
+        # 防止禁用唯一管理员
+        if _is_last_admin(user, db) and not data["is_active"]:
+            return _json_error("禁止禁用唯一管理员")
 
-            # 记录审计日志
-            _audit_log(
-                "toggle_user_status",
-                "user",
-                user_id,
-                {"is_active": user.is_active}
-            )
+        user.is_active = bool(data["is_active"])
+        db.commit()
 
-            return _json_success(data=_user_to_dict(user))
+        # 记录审计日志
+        _audit_log(
+            "toggle_user_status",
+            "user",
+            user_id,
+            {"is_active": user.is_active}
+        )
 
-        finally:
-            db.close()
+        return _json_success(data=_user_to_dict(user))
 
     except Exception as e:
         logger.error(f"切换用户状态失败: {e}", exc_info=True)
@@ -470,27 +636,24 @@ def toggle_user_status(user_id: int):
 def delete_user(user_id: int):
     """删除用户"""
     try:
-        db = get_db()
-        try:
-            user = db.query(User).filter(User.id == user_id).first()
-            if not user:
-                return _json_error("用户不存在", 404)
-
-            # 防止删除唯一管理员
-            if _is_last_admin(user, db):
-                return _json_error("禁止删除唯一管理员")
-
-            username = user.username
-            db.delete(user)
-            db.commit()
-
-            # 记录审计日志
-            _audit_log("delete_user", "user", user_id, {"username": username})
+        db = g.db
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return _json_error("用户不存在", 404)
+
+        # 防止删除唯一管理员
+        if _is_last_admin(user, db):
+            return _json_error("禁止删除唯一管理员")
+
+        username = user.username
+        # 直接执行 DELETE，关联数据由数据库 ON DELETE CASCADE 删除，无需 ORM 逐个加载子对象
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
 
-            return _json_success(message="用户已删除")
+        # 记录审计日志
+        _audit_log("delete_user", "user", user_id, {"username": username})
 
-        finally:
-            db.close()
+        return _json_success(message="用户已删除")
 
     except Exception as e:
         logger.error(f"删除用户失败: {e}", exc_info=True)
@@ -516,56 +679,63 @@ def list_records():
         start_at: 开始时间
         end_at: 结束时间
         sort: 排序字段
+        cursor: 游标分页（可选，空值表示第一页，之后传入上次返回的 next_cursor）
     """
     try:
         page, page_size = _get_pagination_params()
 
-        db = get_db()
-        try:
-            query = db.query(HistoryRecord)
-
-            # 筛选条件
-            if user_id := request.args.get("user_id"):
-                query = query.filter(HistoryRecord.user_id == int(user_id))
-            if status := request.args.get("status"):
-                query = query.filter(HistoryRecord.status == status)
-            if q := request.args.get("q"):
-                query = query.filter(HistoryRecord.title.ilike(f"%{q}%"))
-
-            # 日期筛选（使用 ISO8601 解析）
-            if start_at := request.args.get("start_at"):
-                parsed_start = _parse_iso8601(start_at)
-                if parsed_start:
-                    query = query.filter(HistoryRecord.created_at >= parsed_start)
-            if end_at := request.args.get("end_at"):
-                parsed_end = _parse_iso8601(end_at)
-                if parsed_end:
-                    query = query.filter(HistoryRecord.created_at <= parsed_end)
-
-            # 排序
-            sort = request.args.get("sort", "-created_at")
-            desc = sort.startswith("-")
-            sort_field = sort[1:] if desc else sort
-            if hasattr(HistoryRecord, sort_field):
-                col = getattr(HistoryRecord, sort_field)
-                query = query.order_by(col.desc() if desc else col.asc())
-
-            # 统计总数
-            total = query.count()
-            pages = (total + page_size - 1) // page_size  # 向上取整计算总页数
-
-            # 分页
-            offset = (page - 1) * page_size
-            records = query.offset(offset).limit(page_size).all()
-
-            return _json_success(
-                items=[_record_to_dict(r) for r in records],
-                page=page,
-                pages=pages,
-                total=total,
-            )
-        finally:
-            db.close()
+        db = g.db
+        query = db.query(HistoryRecord).options(_RECORD_LIST_COLUMNS)
+
+        # 筛选条件
+        if user_id := request.args.get("user_id"):
+            query = query.filter(HistoryRecord.user_id == int(user_id))
+        if status := request.args.get("status"):
+            query = query.filter(HistoryRecord.status == status)
+        if q := request.args.get("q"):
+            query = query.filter(HistoryRecord.title.ilike(f"%{q}%"))
+
+        # 日期筛选（使用 ISO8601 解析）
+        if start_at := request.args.get("start_at"):
+            parsed_start = _parse_iso8601(start_at)
+            if parsed_start:
+                query = query.filter(HistoryRecord.created_at >= parsed_start)
+        if end_at := request.args.get("end_at"):
+            parsed_end = _parse_iso8601(end_at)
+            if parsed_end:
+                query = query.filter(HistoryRecord.created_at <= parsed_end)
+
+        # 排序
+        sort = request.args.get("sort", "-created_at")
+        desc = sort.startswith("-")
+        sort_field = sort[1:] if desc else sort
+        col = _RECORD_SORT_COLUMNS.get(sort_field)
+        if col is not None:
+            query = query.order_by(col.desc() if desc else col.asc())
+
+        # 游标分页（传入 cursor 参数时启用，仅支持按 created_at 排序）
+        if "cursor" in request.args:
+            if sort_field != "created_at":
+                return _json_error("cursor 分页仅支持按 created_at 排序")
+            try:
+                records, next_cursor = _keyset_paginate(
+                    query, HistoryRecord, desc, request.args["cursor"], page_size
+                )
+            except ValueError:
+                return _json_error("cursor 参数格式不正确")
+            return _json_stream_items(records, _record_to_dict, next_cursor=next_cursor)
+
+        # 分页（总数与当前页在同一次查询中返回）
+        records, total = _paginate(query, page, page_size)
+        pages = (total + page_size - 1) // page_size  # 向上取整计算总页数
+
+        return _json_stream_items(
+            records,
+            _record_to_dict,
+            page=page,
+            pages=pages,
+            total=total,
+        )
 
     except Exception as e:
         logger.error(f"获取记录列表失败: {e}", exc_info=True)
@@ -577,21 +747,18 @@ def list_records():
 def get_record(record_id: int):
     """获取记录详情（包含完整数据）"""
     try:
-        db = get_db()
-        try:
-            record = db.query(HistoryRecord).filter(HistoryRecord.id == record_id).first()
-            if not record:
-                return _json_error("记录不存在", 404)
+        db = g.db
+        record = db.query(HistoryRecord).filter(HistoryRecord.id == record_id).first()
+        if not record:
+            return _json_error("记录不存在", 404)
 
-            data = _record_to_dict(record)
-            # 添加详细数据
-            data["outline_raw"] = record.outline_raw
-            data["outline_json"] = record.outline_json
-            data["images_json"] = record.images_json
+        data = _record_to_dict(record)
+        # 添加详细数据
+        data["outline_raw"] = record.outline_raw
+        data["outline_json"] = record.outline_json
+        data["images_json"] = record.images_json
 
-            return _json_success(record=data)
-        finally:
-            db.close()
+        return _json_success(record=data)
 
     except Exception as e:
         logger.error(f"获取记录详情失败: {e}", exc_info=True)
@@ -603,23 +770,21 @@ def get_record(record_id: int):
 def delete_record(record_id: int):
     """删除记录"""
     try:
-        db = get_db()
-        try:
-            record = db.query(HistoryRecord).filter(HistoryRecord.id == record_id).first()
-            if not record:
-                return _json_error("记录不存在", 404)
-
-            title = record.title
-            db.delete(record)
-            db.commit()
-
-            # 记录审计日志
-            _audit_log("delete_record", "history_record", record_id, {"title": title})
+        db = g.db
+        title = db.execute(
+            select(HistoryRecord.title).where(HistoryRecord.id == record_id)
+        ).scalar_one_or_none()
+        if title is None:
+            return _json_error("记录不存在", 404)
+
+        # 关联的图片记录由数据库 ON DELETE CASCADE 删除
+        db.execute(delete(HistoryRecord).where(HistoryRecord.id == record_id))
+        db.commit()
 
-            return _json_success(message="记录已删除")
+        # 记录审计日志
+        _audit_log("delete_record", "history_record", record_id, {"title": title})
 
-        finally:
-            db.close()
+        return _json_success(message="记录已删除")
 
     except Exception as e:
         logger.error(f"删除记录失败: {e}", exc_info=True)
@@ -643,20 +808,33 @@ def bulk_delete_records():
         if not ids:
             return _json_error("缺少 ids 参数")
 
-        db = get_db()
-        try:
-            deleted = db.query(HistoryRecord).filter(
-                HistoryRecord.id.in_(ids)
-            ).delete(synchronize_session=False)
-            db.commit()
+        db = g.db
+        delete_stmt = delete(HistoryRecord).where(HistoryRecord.id.in_(ids))
+        if db.get_bind().dialect.delete_returning:
+            # 支持 DELETE ... RETURNING 的数据库：删除时一并返回标题
+            rows = db.execute(
+                delete_stmt.returning(HistoryRecord.id, HistoryRecord.title),
+                execution_options={"synchronize_session": False},
+            ).all()
+        else:
+            # 一次查询取出所有标题（避免逐条查询），再批量删除
+            rows = db.execute(
+                select(HistoryRecord.id, HistoryRecord.title).where(HistoryRecord.id.in_(ids))
+            ).all()
+            db.execute(delete_stmt, execution_options={"synchronize_session": False})
+        db.commit()
 
-            # 记录审计日志
-            _audit_log("bulk_delete_records", "history_record", details={"ids": ids, "deleted": deleted})
+        deleted = len(rows)
+        titles = {str(record_id): title for record_id, title in rows}
 
-            return _json_success(deleted=deleted)
+        # 记录审计日志
+        _audit_log(
+            "bulk_delete_records",
+            "history_record",
+            details={"ids": ids, "titles": titles, "deleted": deleted},
+        )
 
-        finally:
-            db.close()
+        return _json_success(deleted=deleted)
 
     except Exception as e:
         logger.error(f"批量删除记录失败: {e}", exc_info=True)
@@ -682,56 +860,64 @@ def list_images():
         start_at: 开始时间
         end_at: 结束时间
         sort: 排序字段
+        cursor: 游标分页（可选，空值表示第一页，之后传入上次返回的 next_cursor）
     """
     try:
         page, page_size = _get_pagination_params()
 
-        db = get_db()
-        try:
-            query = db.query(ImageFile).options(joinedload(ImageFile.user))
-
-            # 筛选条件
-            if user_id := request.args.get("user_id"):
-                query = query.filter(ImageFile.user_id == int(user_id))
-            if record_id := request.args.get("record_id"):
-                query = query.filter(ImageFile.record_id == int(record_id))
-            if search := request.args.get("search"):
-                query = query.filter(ImageFile.filename.ilike(f"%{search}%"))
-
-            # 日期筛选（使用 ISO8601 解析）
-            if start_at := request.args.get("start_at"):
-                parsed_start = _parse_iso8601(start_at)
-                if parsed_start:
-                    query = query.filter(ImageFile.created_at >= parsed_start)
-            if end_at := request.args.get("end_at"):
-                parsed_end = _parse_iso8601(end_at)
-                if parsed_end:
-                    query = query.filter(ImageFile.created_at <= parsed_end)
-
-            # 排序
-            sort = request.args.get("sort", "-created_at")
-            desc = sort.startswith("-")
-            sort_field = sort[1:] if desc else sort
-            if hasattr(ImageFile, sort_field):
-                col = getattr(ImageFile, sort_field)
-                query = query.order_by(col.desc() if desc else col.asc())
-
-            # 统计总数
-            total = query.count()
-            pages = (total + page_size - 1) // page_size  # 向上取整计算总页数
-
-            # 分页
-            offset = (page - 1) * page_size
-            images = query.offset(offset).limit(page_size).all()
-
-            return _json_success(
-                items=[_image_to_dict(img) for img in images],
-                page=page,
-                pages=pages,
-                total=total,
-            )
-        finally:
-            db.close()
+        db = g.db
+        query = db.query(ImageFile).options(
+            joinedload(ImageFile.user).load_only(User.id, User.username)
+        )
+
+        # 筛选条件
+        if user_id := request.args.get("user_id"):
+            query = query.filter(ImageFile.user_id == int(user_id))
+        if record_id := request.args.get("record_id"):
+            query = query.filter(ImageFile.record_id == int(record_id))
+        if search := request.args.get("search"):
+            query = query.filter(ImageFile.filename.ilike(f"%{search}%"))
+
+        # 日期筛选（使用 ISO8601 解析）
+        if start_at := request.args.get("start_at"):
+            parsed_start = _parse_iso8601(start_at)
+            if parsed_start:
+                query = query.filter(ImageFile.created_at >= parsed_start)
+        if end_at := request.args.get("end_at"):
+            parsed_end = _parse_iso8601(end_at)
+            if parsed_end:
+                query = query.filter(ImageFile.created_at <= parsed_end)
+
+        # 排序
+        sort = request.args.get("sort", "-created_at")
+        desc = sort.startswith("-")
+        sort_field = sort[1:] if desc else sort
+        col = _IMAGE_SORT_COLUMNS.get(sort_field)
+        if col is not None:
+            query = query.order_by(col.desc() if desc else col.asc())
+
+        # 游标分页（传入 cursor 参数时启用，仅支持按 created_at 排序）
+        if "cursor" in request.args:
+            if sort_field != "created_at":
+                return _json_error("cursor 分页仅支持按 created_at 排序")
+            try:
+                images, next_cursor = _keyset_paginate(
+                    query, ImageFile, desc, request.args["cursor"], page_size
+                )
+            except ValueError:
+                return _json_error("cursor 参数格式不正确")
+            return _json_success(items=[_image_to_dict(img) for img in images], next_cursor=next_cursor)
+
+        # 分页（总数与当前页在同一次查询中返回）
+        images, total = _paginate(query, page, page_size)
+        pages = (total + page_size - 1) // page_size  # 向上取整计算总页数
+
+        return _json_success(
+            items=[_image_to_dict(img) for img in images],
+            page=page,
+            pages=pages,
+            total=total,
+        )
 
     except Exception as e:
         logger.error(f"获取图片列表失败: {e}", exc_info=True)
@@ -743,74 +929,70 @@ def list_images():
 def image_stats():
     """获取图片存储统计"""
     try:
-        db = get_db()
-        try:
-            total_count = db.query(ImageFile).count()
-            total_size = db.query(func.coalesce(func.sum(ImageFile.file_size), 0)).scalar()
-
-            # 今日新增统计
-            today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-            today_count = db.query(ImageFile).filter(ImageFile.created_at >= today_start).count()
-
-            # 按用户统计
-            user_stats = db.query(
-                ImageFile.user_id,
-                func.count(ImageFile.id).label("count"),
-                func.coalesce(func.sum(ImageFile.file_size), 0).label("size")
-            ).group_by(ImageFile.user_id).all()
-
-            return _json_success(
-                stats={
-                    "total_count": total_count,
-                    "total_size": total_size,
-                    "total_size_bytes": total_size,
-                    "total_size_mb": round(total_size / (1024 * 1024), 2) if total_size else 0,
-                    "today_count": today_count,
-                    "by_user": [
-                        {"user_id": s.user_id, "count": s.count, "size_bytes": s.size}
-                        for s in user_stats
-                    ]
-                }
-            )
-        finally:
-            db.close()
+        db = g.db
+        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        # 按用户统计（一次扫描同时算出今日新增，总数由各分组汇总得到）
+        user_stats = db.query(
+            ImageFile.user_id,
+            func.count(ImageFile.id).label("count"),
+            cast(func.coalesce(func.sum(ImageFile.file_size), 0), BigInteger).label("size"),
+            func.count(case((ImageFile.created_at >= today_start, 1))).label("today"),
+        ).group_by(ImageFile.user_id).all()
+
+        total_count = sum(s.count for s in user_stats)
+        total_size = sum(s.size for s in user_stats)
+        today_count = sum(s.today for s in user_stats)
+
+        return _json_success(
+            stats={
+                "total_count": total_count,
+                "total_size": total_size,
+                "total_size_bytes": total_size,
+                "total_size_mb": round(total_size / (1024 * 1024), 2) if total_size else 0,
+                "today_count": today_count,
+                "by_user": [
+                    {"user_id": s.user_id, "count": s.count, "size_bytes": s.size}
+                    for s in user_stats
+                ]
+            }
+        )
 
     except Exception as e:
         logger.error(f"获取图片统计失败: {e}", exc_info=True)
         return _json_error("获取图片统计失败", 500)
 
 
+def _safe_unlink(file_path: Path) -> None:
+    """删除文件，文件不存在时忽略，其他错误仅记录警告"""
+    try:
+        file_path.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"删除文件失败: {file_path}, {e}")
+
+
 @admin_bp.route("/images/<int:image_id>", methods=["DELETE"])
 @admin_required
 def delete_image(image_id: int):
     """删除图片"""
     try:
-        db = get_db()
-        try:
-            image = db.query(ImageFile).filter(ImageFile.id == image_id).first()
-            if not image:
-                return _json_error("图片不存在", 404)
-
-            filename = image.filename
-
-            # 删除物理文件
-            file_path = Path(Config.OUTPUT_DIR) / filename
-            if file_path.exists():
-                try:
-                    file_path.unlink()
-                except Exception as e:
-                    logger.warning(f"删除文件失败: {file_path}, {e}")
+        db = g.db
+        filename = db.execute(
+            select(ImageFile.filename).where(ImageFile.id == image_id)
+        ).scalar_one_or_none()
+        if filename is None:
+            return _json_error("图片不存在", 404)
 
-            db.delete(image)
-            db.commit()
+        # 删除物理文件
+        _safe_unlink(Path(Config.OUTPUT_DIR) / filename)
 
-            # 记录审计日志
-            _audit_log("delete_image", "image_file", image_id, {"filename": filename})
+        db.execute(delete(ImageFile).where(ImageFile.id == image_id))
+        db.commit()
 
-            return _json_success(message="图片已删除")
+        # 记录审计日志
+        _audit_log("delete_image", "image_file", image_id, {"filename": filename})
 
-        finally:
-            db.close()
+        return _json_success(message="图片已删除")
 
     except Exception as e:
         logger.error(f"删除图片失败: {e}", exc_info=True)
@@ -834,33 +1016,31 @@ def bulk_delete_images():
         if not ids:
             return _json_error("缺少 ids 参数")
 
-        db = get_db()
-        try:
-            # 获取要删除的图片信息
-            images = db.query(ImageFile).filter(ImageFile.id.in_(ids)).all()
-
-            # 删除物理文件
-            for image in images:
-                file_path = Path(Config.OUTPUT_DIR) / image.filename
-                if file_path.exists():
-                    try:
-                        file_path.unlink()
-                    except Exception as e:
-                        logger.warning(f"删除文件失败: {file_path}, {e}")
-
-            # 删除数据库记录
-            deleted = db.query(ImageFile).filter(
-                ImageFile.id.in_(ids)
-            ).delete(synchronize_session=False)
-            db.commit()
-
-            # 记录审计日志
-            _audit_log("bulk_delete_images", "image_file", details={"ids": ids, "deleted": deleted})
+        db = g.db
+        # 只查询文件名，无需构造 ORM 对象
+        filenames = db.execute(
+            select(ImageFile.filename).where(ImageFile.id.in_(ids))
+        ).scalars().all()
+
+        # 删除物理文件（文件 I/O 会释放 GIL，多个文件并发删除）
+        output_dir = Path(Config.OUTPUT_DIR)
+        paths = [output_dir / filename for filename in filenames]
+        if len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=min(UNLINK_MAX_WORKERS, len(paths))) as executor:
+                list(executor.map(_safe_unlink, paths))
+        elif paths:
+            _safe_unlink(paths[0])
+
+        # 删除数据库记录
+        deleted = db.query(ImageFile).filter(
+            ImageFile.id.in_(ids)
+        ).delete(synchronize_session=False)
+        db.commit()
 
-            return _json_success(deleted=deleted)
+        # 记录审计日志
+        _audit_log("bulk_delete_images", "image_file", details={"ids": ids, "deleted": deleted})
 
-        finally:
-            db.close()
+        return _json_success(deleted=deleted)
 
     except Exception as e:
         logger.error(f"批量删除图片失败: {e}", exc_info=True)
@@ -871,17 +1051,84 @@ def bulk_delete_images():
 # 配置文件管理（image_providers.yaml）
 # ============================================================================
 
+# 配置文件路径（模块加载时计算一次）
+_CONFIG_PATH = (Path(__file__).parent.parent.parent / "image_providers.yaml").resolve()
+
+
 def _get_config_path() -> Path:
     """获取配置文件路径"""
-    return Path(__file__).parent.parent.parent / "image_providers.yaml"
+    return _CONFIG_PATH
+
+
+# 配置文件解析缓存，以文件 (mtime, size) 作为键，文件未变化时复用解析结果
+_config_file_cache = {"key": None, "content": None, "parsed": None}
+
+
+def _read_config_file(config_path: Path) -> tuple:
+    """
+    读取并解析配置文件，文件未变化时直接返回缓存
+
+    Args:
+        config_path: 配置文件路径
+
+    Returns:
+        tuple: (文件内容, 解析结果；YAML 语法错误时为 None)
+    """
+    global _config_file_cache
+    stat = config_path.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    cache = _config_file_cache
+    if cache["key"] == key:
+        return cache["content"], cache["parsed"]
+
+    content = config_path.read_text(encoding="utf-8")
+
+    try:
+        parsed = fast_yaml.safe_load(content) if content else {}
+    except yaml.YAMLError:
+        parsed = None
+
+    # 整体替换字典，避免并发读取到键与内容不一致的缓存
+    _config_file_cache = {"key": key, "content": content, "parsed": parsed}
+    return content, parsed
+
+
+def _write_config_file(config_path: Path, content: str) -> None:
+    """
+    原子写入配置文件
+
+    先写入同目录下的临时文件并 fsync，再用 os.replace 替换原文件，
+    进程崩溃时不会留下被截断的配置文件
+
+    Args:
+        config_path: 配置文件路径
+        content: 文件内容
+    """
+    tmp_path = config_path.with_suffix(config_path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, config_path)
+
+    # fsync 目录，确保重命名本身已落盘（Windows 不支持打开目录）
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(config_path.parent, os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
 
 
 def _get_next_version(config_name: str, db) -> int:
-    """获取下一个版本号"""
-    last = db.query(ConfigVersion).filter(
-        ConfigVersion.config_name == config_name
-    ).order_by(ConfigVersion.version.desc()).first()
-    return 1 if not last else last.version + 1
+    """
+    获取下一个版本号
+
+    并发写入时 (config_name, version) 唯一约束会使重复版本号的插入失败，不会静默覆盖
+    """
+    return db.query(
+        func.coalesce(func.max(ConfigVersion.version), 0) + 1
+    ).filter(ConfigVersion.config_name == config_name).scalar()
 
 
 @admin_bp.route("/config/image-providers", methods=["GET"])
@@ -893,13 +1140,7 @@ def get_image_providers():
         if not config_path.exists():
             return _json_error("配置文件不存在", 404)
 
-        with open(config_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        try:
-            parsed = yaml.safe_load(content) if content else {}
-        except yaml.YAMLError:
-            parsed = None
+        content, parsed = _read_config_file(config_path)
 
         return _json_success(data={
             "content": content,
@@ -931,7 +1172,7 @@ def update_image_providers():
 
         # YAML 语法验证
         try:
-            parsed = yaml.safe_load(io.StringIO(content)) or {}
+            parsed = fast_yaml.safe_load(content) or {}
         except yaml.YAMLError as e:
             return _json_error(f"YAML 语法错误: {e}")
 
@@ -941,67 +1182,78 @@ def update_image_providers():
 
         config_path = _get_config_path()
 
-        db = get_db()
-        try:
-            # 保存配置文件
-            with open(config_path, "w", encoding="utf-8") as f:
-                f.write(content)
-
-            # 清除缓存
-            Config._image_providers_config = None
-
-            # 记录版本
-            user = get_current_user()
-            version = _get_next_version("image_providers", db)
-            cv = ConfigVersion(
-                config_name="image_providers",
-                version=version,
-                content=content,
-                diff_summary=data.get("diff_summary"),
-                created_by=user.id if user else None,
-            )
-            db.add(cv)
-            db.commit()
+        db = g.db
+        # 保存配置文件
+        _write_config_file(config_path, content)
 
-            # 记录审计日志
-            _audit_log("update_image_providers", "config", version, {"version": version})
+        # 复用已解析的配置更新缓存，下次读取时无需重新解析
+        Config._image_providers_config = parsed
+
+        # 记录版本
+        user = get_current_user()
+        version = _get_next_version("image_providers", db)
+        cv = ConfigVersion(
+            config_name="image_providers",
+            version=version,
+            content=content,
+            diff_summary=data.get("diff_summary"),
+            created_by=user.id if user else None,
+        )
+        db.add(cv)
+        db.commit()
 
-            return _json_success(data={
-                "version": version,
-                "parsed": parsed,
-            })
+        # 记录审计日志
+        _audit_log("update_image_providers", "config", version, {"version": version})
 
-        finally:
-            db.close()
+        return _json_success(data={
+            "version": version,
+            "parsed": parsed,
+        })
 
     except Exception as e:
         logger.error(f"更新配置失败: {e}", exc_info=True)
         return _json_error("更新配置失败", 500)
 
 
+def _config_history_response(db, config_name: str, page: int, page_size: int) -> Response:
+    """按版本号降序分页返回配置变更历史（不加载体积较大的 content 列）"""
+    query = db.query(ConfigVersion).options(defer(ConfigVersion.content)).filter(
+        ConfigVersion.config_name == config_name
+    ).order_by(ConfigVersion.version.desc())
+
+    versions, total = _paginate(query, page, page_size)
+    pages = (total + page_size - 1) // page_size  # 向上取整计算总页数
+
+    return _json_success(
+        data=[
+            {
+                "id": v.id,
+                "version": v.version,
+                "diff_summary": v.diff_summary,
+                "created_at": v.created_at,
+                "created_by": v.created_by,
+            }
+            for v in versions
+        ],
+        page=page,
+        pages=pages,
+        total=total,
+    )
+
+
 @admin_bp.route("/config/image-providers/history", methods=["GET"])
 @admin_required
 def image_providers_history():
-    """获取配置修改历史"""
+    """
+    获取配置修改历史（分页）
+
+    Query Parameters:
+        page: 页码
+        page_size: 每页数量
+    """
     try:
-        db = get_db()
-        try:
-            versions = db.query(ConfigVersion).filter(
-                ConfigVersion.config_name == "image_providers"
-            ).order_by(ConfigVersion.version.desc()).all()
-
-            return _json_success(data=[
-                {
-                    "id": v.id,
-                    "version": v.version,
-                    "diff_summary": v.diff_summary,
-                    "created_at": v.created_at.isoformat() if v.created_at else None,
-                    "created_by": v.created_by,
-                }
-                for v in versions
-            ])
-        finally:
-            db.close()
+        page, page_size = _get_pagination_params()
+        return _config_history_response(g.db, "image_providers", page, page_size)
 
     except Exception as e:
         logger.error(f"获取配置历史失败: {e}", exc_info=True)
@@ -1013,26 +1265,23 @@ def image_providers_history():
 def get_image_providers_version(version: int):
     """获取指定版本的配置"""
     try:
-        db = get_db()
-        try:
-            cv = db.query(ConfigVersion).filter(
-                ConfigVersion.config_name == "image_providers",
-                ConfigVersion.version == version
-            ).first()
-
-            if not cv:
-                return _json_error("版本不存在", 404)
-
-            return _json_success(data={
-                "id": cv.id,
-                "version": cv.version,
-                "content": cv.content,
-                "diff_summary": cv.diff_summary,
-                "created_at": cv.created_at.isoformat() if cv.created_at else None,
-                "created_by": cv.created_by,
-            })
-        finally:
-            db.close()
+        db = g.db
+        cv = db.query(ConfigVersion).filter(
+            ConfigVersion.config_name == "image_providers",
+            ConfigVersion.version == version
+        ).first()
+
+        if not cv:
+            return _json_error("版本不存在", 404)
+
+        return _json_success(data={
+            "id": cv.id,
+            "version": cv.version,
+            "content": cv.content,
+            "diff_summary": cv.diff_summary,
+            "created_at": cv.created_at,
+            "created_by": cv.created_by,
+        })
 
     except Exception as e:
         logger.error(f"获取配置版本失败: {e}", exc_info=True)
@@ -1044,52 +1293,47 @@ def get_image_providers_version(version: int):
 def rollback_image_providers(version: int):
     """回滚到指定版本"""
     try:
-        db = get_db()
-        try:
-            cv = db.query(ConfigVersion).filter(
-                ConfigVersion.config_name == "image_providers",
-                ConfigVersion.version == version
-            ).first()
-
-            if not cv:
-                return _json_error("版本不存在", 404)
-
-            # 保存配置文件
-            config_path = _get_config_path()
-            with open(config_path, "w", encoding="utf-8") as f:
-                f.write(cv.content)
-
-            # 清除缓存
-            Config._image_providers_config = None
-
-            # 创建新版本记录
-            user = get_current_user()
-            new_version = _get_next_version("image_providers", db)
-            new_cv = ConfigVersion(
-                config_name="image_providers",
-                version=new_version,
-                content=cv.content,
-                diff_summary=f"回滚到版本 {version}",
-                created_by=user.id if user else None,
-            )
-            db.add(new_cv)
-            db.commit()
+        db = g.db
+        cv = db.query(ConfigVersion).filter(
+            ConfigVersion.config_name == "image_providers",
+            ConfigVersion.version == version
+        ).first()
 
-            # 记录审计日志
-            _audit_log(
-                "rollback_image_providers",
-                "config",
-                new_version,
-                {"rolled_back_to": version}
-            )
+        if not cv:
+            return _json_error("版本不存在", 404)
 
-            return _json_success(data={
-                "rolled_back_to": version,
-                "new_version": new_version,
-            })
+        # 保存配置文件
+        config_path = _get_config_path()
+        _write_config_file(config_path, cv.content)
 
-        finally:
-            db.close()
+        # 清除缓存
+        Config._image_providers_config = None
+
+        # 创建新版本记录
+        user = get_current_user()
+        new_version = _get_next_version("image_providers", db)
+        new_cv = ConfigVersion(
+            config_name="image_providers",
+            version=new_version,
+            content=cv.content,
+            diff_summary=f"回滚到版本 {version}",
+            created_by=user.id if user else None,
+        )
+        db.add(new_cv)
+        db.commit()
+
+        # 记录审计日志
+        _audit_log(
+            "rollback_image_providers",
+            "config",
+            new_version,
+            {"rolled_back_to": version}
+        )
+
+        return _json_success(data={
+            "rolled_back_to": version,
+            "new_version": new_version,
+        })
 
     except Exception as e:
         logger.error(f"回滚配置失败: {e}", exc_info=True)
@@ -1121,7 +1365,7 @@ def _registration_to_dict(setting: RegistrationSetting) -> dict:
         "invite_code": setting.invite_code,
         "email_verification_required": setting.email_verification_required,
         "rate_limit_per_hour": setting.rate_limit_per_hour,
-        "updated_at": setting.updated_at.isoformat() if setting.updated_at else None,
+        "updated_at": setting.updated_at,
         "updated_by": setting.updated_by,
     }
 
@@ -1131,12 +1375,9 @@ def _registration_to_dict(setting: RegistrationSetting) -> dict:
 def get_registration():
     """获取注册配置"""
     try:
-        db = get_db()
-        try:
-            setting = _get_registration_setting(db)
-            return _json_success(data=_registration_to_dict(setting))
-        finally:
-            db.close()
+        db = g.db
+        setting = _get_registration_setting(db)
+        return _json_success(data=_registration_to_dict(setting))
 
     except Exception as e:
         logger.error(f"获取注册配置失败: {e}", exc_info=True)
@@ -1173,46 +1414,48 @@ def update_registration():
                     f"default_role 必须是以下值之一: {', '.join(ALLOWED_DEFAULT_ROLES)}"
                 )
 
-        db = get_db()
-        try:
-            setting = _get_registration_setting(db)
-            user = get_current_user()
-
-            # 更新字段
-            changes = {}
-            for field in ["enabled", "default_role", "invite_required", "invite_code",
-                          "email_verification_required", "rate_limit_per_hour"]:
-                if field in data and hasattr(setting, field):
-                    old_value = getattr(setting, field)
-                    new_value = data[field]
-                    if old_value != new_value:
-                        setattr(setting, field, new_value)
-                        changes[field] = {"old": old_value, "new": new_value}
-
-            setting.updated_by = user.id if user else None
-            db.commit()
-            db.refresh(setting)
-
-            # 记录版本
-            if changes:
-                version = _get_next_version("registration", db)
-                cv = ConfigVersion(
-                    config_name="registration",
-                    version=version,
-                    content=yaml.safe_dump(_registration_to_dict(setting), allow_unicode=True),
-                    diff_summary=str(changes),
-                    created_by=user.id if user else None,
-                )
-                db.add(cv)
-                db.commit()
-
-                # 记录审计日志
-                _audit_log("update_registration", "config", version, changes)
+        db = g.db
+        setting = _get_registration_setting(db)
+        user = get_current_user()
 
+        # 先计算变更，不修改对象
+        changes = {}
+        for field in ["enabled", "default_role", "invite_required", "invite_code",
+                      "email_verification_required", "rate_limit_per_hour"]:
+            if field in data and hasattr(setting, field):
+                old_value = getattr(setting, field)
+                new_value = data[field]
+                if old_value != new_value:
+                    changes[field] = {"old": old_value, "new": new_value}
+
+        # 没有实际变更时直接返回，不产生写入
+        if not changes:
             return _json_success(data=_registration_to_dict(setting))
 
-        finally:
-            db.close()
+        # 更新字段
+        for field, change in changes.items():
+            setattr(setting, field, change["new"])
+        setting.updated_by = user.id if user else None
+        # 显式设置更新时间（不依赖 onupdate 的服务端默认值），提交后无需重新加载
+        setting.updated_at = datetime.now(timezone.utc)
+
+        # 记录版本（与配置更新在同一事务中提交）
+        version = _get_next_version("registration", db)
+        cv = ConfigVersion(
+            config_name="registration",
+            version=version,
+            # 只保存本次变更的字段（JSON），完整配置可由各版本依次回放得到
+            content=fast_json.dumps(changes).decode("utf-8"),
+            diff_summary=str(changes),
+            created_by=user.id if user else None,
+        )
+        db.add(cv)
+        db.commit()
+
+        # 记录审计日志
+        _audit_log("update_registration", "config", version, changes)
+
+        return _json_success(data=_registration_to_dict(setting))
 
     except Exception as e:
         logger.error(f"更新注册配置失败: {e}", exc_info=True)
@@ -1222,26 +1465,16 @@ def update_registration():
 @admin_bp.route("/registration/history", methods=["GET"])
 @admin_required
 def registration_history():
-    """获取注册配置变更历史"""
+    """
+    获取注册配置变更历史（分页）
+
+    Query Parameters:
+        page: 页码
+        page_size: 每页数量
+    """
     try:
-        db = get_db()
-        try:
-            versions = db.query(ConfigVersion).filter(
-                ConfigVersion.config_name == "registration"
-            ).order_by(ConfigVersion.version.desc()).all()
-
-            return _json_success(data=[
-                {
-                    "id": v.id,
-                    "version": v.version,
-                    "diff_summary": v.diff_summary,
-                    "created_at": v.created_at.isoformat() if v.created_at else None,
-                    "created_by": v.created_by,
-                }
-                for v in versions
-            ])
-        finally:
-            db.close()
+        page, page_size = _get_pagination_params()
+        return _config_history_response(g.db, "registration", page, page_size)
 
     except Exception as e:
         logger.error(f"获取注册配置历史失败: {e}", exc_info=True)
@@ -1252,6 +1485,15 @@ def registration_history():
 # 审计日志
 # ============================================================================
 
+# 审计日志列表按列投影查询，不构造 ORM 对象
+_AUDIT_LOG_COLUMNS = tuple(getattr(AuditLog, f) for f in _AUDIT_LOG_FIELDS)
+
+
+def _audit_log_to_dict(row) -> dict:
+    """将审计日志查询行（按 _AUDIT_LOG_FIELDS 顺序的列值）转换为字典"""
+    return dict(zip(_AUDIT_LOG_FIELDS, row))
+
+
 @admin_bp.route("/audit-logs", methods=["GET"])
 @admin_required
 def list_audit_logs():
@@ -1266,64 +1508,59 @@ def list_audit_logs():
         resource_type: 资源类型筛选
         start_at: 开始时间
         end_at: 结束时间
+        cursor: 游标分页（可选，空值表示第一页，之后传入上次返回的 next_cursor）
     """
     try:
         page, page_size = _get_pagination_params()
 
-        db = get_db()
-        try:
-            query = db.query(AuditLog)
-
-            # 筛选条件
-            if actor_id := request.args.get("actor_id"):
-                query = query.filter(AuditLog.actor_id == int(actor_id))
-            if action := request.args.get("action"):
-                query = query.filter(AuditLog.action == action)
-            if resource_type := request.args.get("resource_type"):
-                query = query.filter(AuditLog.resource_type == resource_type)
-
-            # 日期筛选（使用 ISO8601 解析）
-            if start_at := request.args.get("start_at"):
-                parsed_start = _parse_iso8601(start_at)
-                if parsed_start:
-                    query = query.filter(AuditLog.created_at >= parsed_start)
-            if end_at := request.args.get("end_at"):
-                parsed_end = _parse_iso8601(end_at)
-                if parsed_end:
-                    query = query.filter(AuditLog.created_at <= parsed_end)
-
-            # 排序（默认按时间降序）
-            query = query.order_by(AuditLog.created_at.desc())
-
-            # 统计总数
-            total = query.count()
-            pages = (total + page_size - 1) // page_size  # 向上取整计算总页数
-
-            # 分页
-            offset = (page - 1) * page_size
-            logs = query.offset(offset).limit(page_size).all()
-
-            return _json_success(
-                items=[
-                    {
-                        "id": log.id,
-                        "actor_id": log.actor_id,
-                        "actor_username": log.actor_username,
-                        "action": log.action,
-                        "resource_type": log.resource_type,
-                        "resource_id": log.resource_id,
-                        "details": log.details,
-                        "ip_address": log.ip_address,
-                        "created_at": log.created_at.isoformat() if log.created_at else None,
-                    }
-                    for log in logs
-                ],
-                page=page,
-                pages=pages,
-                total=total,
-            )
-        finally:
-            db.close()
+        db = g.db
+        query = db.query(*_AUDIT_LOG_COLUMNS)
+
+        # 筛选条件
+        if actor_id := request.args.get("actor_id"):
+            if not actor_id.isdigit():
+                return _json_error("actor_id 参数格式不正确")
+            query = query.filter(AuditLog.actor_id == int(actor_id))
+        if action := request.args.get("action"):
+            query = query.filter(AuditLog.action == action)
+        if resource_type := request.args.get("resource_type"):
+            query = query.filter(AuditLog.resource_type == resource_type)
+
+        # 日期筛选（解析为 datetime 后与索引列直接比较，格式错误返回 400）
+        if start_at := request.args.get("start_at"):
+            parsed_start = _parse_iso8601(start_at)
+            if parsed_start is None:
+                return _json_error("start_at 参数格式不正确")
+            query = query.filter(AuditLog.created_at >= parsed_start)
+        if end_at := request.args.get("end_at"):
+            parsed_end = _parse_iso8601(end_at)
+            if parsed_end is None:
+                return _json_error("end_at 参数格式不正确")
+            query = query.filter(AuditLog.created_at <= parsed_end)
+
+        # 游标分页（传入 cursor 参数时启用，深分页时无需扫描前面的行）
+        if "cursor" in request.args:
+            try:
+                logs, next_cursor = _keyset_paginate(
+                    query, AuditLog, True, request.args["cursor"], page_size
+                )
+            except ValueError:
+                return _json_error("cursor 参数格式不正确")
+            return _json_success(items=[_audit_log_to_dict(log) for log in logs], next_cursor=next_cursor)
+
+        # 排序（默认按时间降序）
+        query = query.order_by(AuditLog.created_at.desc())
+
+        # 分页（总数与当前页在同一次查询中返回）
+        logs, total = _paginate(query, page, page_size)
+        pages = (total + page_size - 1) // page_size  # 向上取整计算总页数
+
+        return _json_success(
+            items=[_audit_log_to_dict(log) for log in logs],
+            page=page,
+            pages=pages,
+            total=total,
+        )
 
     except Exception as e:
         logger.error(f"获取审计日志失败: {e}", exc_info=True)
@@ -1334,48 +1571,74 @@ def list_audit_logs():
 # 仪表盘统计
 # ============================================================================
 
+# 仪表盘统计缓存（多个管理员同时打开仪表盘时共用一次查询）
+DASHBOARD_STATS_TTL = 30  # 秒
+_dashboard_stats_cache = {"ts": 0.0, "data": None}
+_dashboard_stats_lock = threading.Lock()
+
+
+def _compute_dashboard_stats(db) -> dict:
+    """查询仪表盘统计数据"""
+    # 每张表一次条件聚合扫描，三个单行子查询合并为一次查询返回
+    user_totals = select(
+        func.count().label("total_users"),
+        func.count(case((User.is_active == True, 1))).label("active_users"),
+        # PRO用户数量统计（role字段直接查询）
+        func.count(case((User.role == "pro", 1))).label("pro_users"),
+    ).subquery()
+    record_totals = select(
+        func.count().label("total_records"),
+        func.count(case((HistoryRecord.status == "completed", 1))).label("completed_records"),
+    ).subquery()
+    image_totals = select(
+        func.count().label("total_images"),
+        cast(func.coalesce(func.sum(ImageFile.file_size), 0), BigInteger).label("total_size"),
+    ).subquery()
+
+    stats = db.execute(
+        select(user_totals, record_totals, image_totals).select_from(
+            user_totals.join(record_totals, true()).join(image_totals, true())
+        )
+    ).one()
+    total_users, active_users, pro_users = stats.total_users, stats.active_users, stats.pro_users
+    total_records, completed_records = stats.total_records, stats.completed_records
+    total_images, total_size = stats.total_images, stats.total_size
+
+    return {
+        "users": {
+            "total": total_users,
+            "active": active_users,
+            "pro": pro_users,  # PRO用户数量（VIP用户）
+        },
+        "records": {
+            "total": total_records,
+            "completed": completed_records,
+        },
+        "images": {
+            "total": total_images,
+            "size_bytes": total_size,
+            "size_mb": round(total_size / (1024 * 1024), 2) if total_size else 0,
+        },
+    }
+
+
 @admin_bp.route("/dashboard/stats", methods=["GET"])
 @admin_required
 def dashboard_stats():
     """获取仪表盘统计数据"""
     try:
-        db = get_db()
-        try:
-            # 用户统计
-            total_users = db.query(User).count()
-            active_users = db.query(User).filter(User.is_active == True).count()
-
-            # PRO用户数量统计（role字段直接查询）
-            pro_users = db.query(User).filter(User.role == "pro").count()
-
-            # 记录统计
-            total_records = db.query(HistoryRecord).count()
-            completed_records = db.query(HistoryRecord).filter(
-                HistoryRecord.status == "completed"
-            ).count()
-
-            # 图片统计
-            total_images = db.query(ImageFile).count()
-            total_size = db.query(func.coalesce(func.sum(ImageFile.file_size), 0)).scalar()
-
-            return _json_success(data={
-                "users": {
-                    "total": total_users,
-                    "active": active_users,
-                    "pro": pro_users,  # PRO用户数量（VIP用户）
-                },
-                "records": {
-                    "total": total_records,
-                    "completed": completed_records,
-                },
-                "images": {
-                    "total": total_images,
-                    "size_bytes": total_size,
-                    "size_mb": round(total_size / (1024 * 1024), 2) if total_size else 0,
-                },
-            })
-        finally:
-            db.close()
+        now = time.monotonic()
+        data = _dashboard_stats_cache["data"]
+        if data is None or now - _dashboard_stats_cache["ts"] >= DASHBOARD_STATS_TTL:
+            with _dashboard_stats_lock:
+                # 双重检查：等待锁期间其他请求可能已刷新缓存
+                data = _dashboard_stats_cache["data"]
+                if data is None or time.monotonic() - _dashboard_stats_cache["ts"] >= DASHBOARD_STATS_TTL:
+                    data = _compute_dashboard_stats(g.db)
+                    _dashboard_stats_cache["data"] = data
+                    _dashboard_stats_cache["ts"] = time.monotonic()
+
+        return _json_success(data=data)
 
     except Exception as e:
         logger.error(f"获取仪表盘统计失败: {e}", exc_info=True)
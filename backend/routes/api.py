@@ -1,16 +1,19 @@
 """API 路由"""
-import base64
 import json
 import logging
+import shutil
+import time
+from pathlib import Path
 from typing import Any, Dict, List, Optional
 from flask import Blueprint, request, jsonify, Response, send_file
 from backend.config import Config
 from backend.services.image import get_image_service, get_scoped_image_service, ImageTaskStateStore
 from backend.services.history import get_history_service
-from backend.task_queue import get_outline_queue, get_image_queue
+from backend.task_queue import get_outline_queue, get_image_queue, get_redis_connection
 from backend.task_queue.task_store import TaskStore, TaskType, TaskStatus
 from backend.tasks import generate_outline_task, generate_images_task
 from backend.auth import login_required, get_current_user
+from backend.utils import fast_json
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +38,36 @@ def _get_image_service_for_task(task_id: str, fallback_role: Optional[str] = Non
     return get_scoped_image_service(provider_name=provider_name, user_role=user_role)
 
 
+def _outline_upload_dir(task_id: str) -> Path:
+    """返回大纲任务参考图片的共享保存目录。"""
+    return Path(Config.DATA_DIR) / "uploads" / task_id
+
+
+def _save_outline_uploads(task_id: str, files: List[Any]) -> List[str]:
+    """将大纲任务的参考图片保存到 worker 可访问的共享目录。
+
+    FileStorage.save 按块复制（Werkzeug 已将较大的上传内容缓存在临时文件中），
+    不会把整张图片读入内存。目录由 worker 在任务结束时删除；
+    入队失败时由调用方删除。
+
+    Args:
+        task_id: 任务 ID（用作子目录名）
+        files: 上传的文件列表
+
+    Returns:
+        保存后的文件路径列表
+    """
+    upload_dir = _outline_upload_dir(task_id)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+
+    paths = []
+    for idx, file in enumerate(files):
+        path = upload_dir / str(idx)
+        file.save(path)
+        paths.append(str(path))
+    return paths
+
+
 @api_bp.route('/outline', methods=['POST'])
 @login_required
 def create_outline_task():
@@ -51,20 +84,17 @@ def create_outline_task():
 
     前端需轮询 GET /api/outline/<task_id> 获取结果。
     """
+    upload_dir = None
     try:
         user = get_current_user()
         user_id = str(user.id)
         images_base64 = []
+        upload_files = []
 
         # 解析请求体
         if request.content_type and 'multipart/form-data' in request.content_type:
             topic = request.form.get('topic')
-            if 'images' in request.files:
-                files = request.files.getlist('images')
-                for file in files:
-                    if file and file.filename:
-                        image_data = file.read()
-                        images_base64.append(base64.b64encode(image_data).decode('utf-8'))
+            upload_files = [file for file in request.files.getlist('images') if file and file.filename]
         else:
             data = request.get_json() or {}
             topic = data.get('topic')
@@ -85,6 +115,12 @@ def create_outline_task():
             extra_fields={"topic": topic.strip()},
         )
 
+        # multipart 上传的图片直接写入共享目录，队列中只传文件路径（不做 base64 编码）
+        image_paths = None
+        if upload_files:
+            upload_dir = _outline_upload_dir(task_id)
+            image_paths = _save_outline_uploads(task_id, upload_files)
+
         # 入队异步执行
         outline_queue = get_outline_queue()
         outline_queue.enqueue(
@@ -92,6 +128,7 @@ def create_outline_task():
             task_id,
             topic.strip(),
             images_base64 if images_base64 else None,
+            image_paths=image_paths,
             job_id=task_id,
         )
 
@@ -105,6 +142,9 @@ def create_outline_task():
 
     except Exception as e:
         logger.exception("创建大纲任务失败")
+        # 任务未能入队时 worker 不会清理，上传目录需在此删除
+        if upload_dir is not None:
+            shutil.rmtree(upload_dir, ignore_errors=True)
         return jsonify({
             "success": False,
             "error": str(e)
@@ -150,15 +190,16 @@ def get_outline_task_status(task_id: str):
             "progress_total": task.get("progress_total", 0),
         }
 
-        # 解析结果字段
+        # 解析结果字段（任务结果总是 JSON 对象，按首字符分派，非对象内容原样返回）
         result_str = task.get("result", "")
         if result_str:
-            try:
-                result_data = json.loads(result_str)
-                if isinstance(result_data, dict):
+            if result_str[:1] == "{":
+                try:
                     # 展开结果到响应中
-                    response.update(result_data)
-            except json.JSONDecodeError:
+                    response.update(fast_json.loads(result_str))
+                except json.JSONDecodeError:
+                    response["result"] = result_str
+            else:
                 response["result"] = result_str
 
         # 添加错误信息
@@ -310,6 +351,61 @@ def create_image_task():
         }), 500
 
 
+# SSE 连接计数 key 的过期时间（秒），防止进程异常退出后计数无法归还
+SSE_CONN_COUNTER_TTL = 60 * 60
+
+# 占用名额：仅在计数从 0 变为 1 时设置过期时间，超限时回滚且不刷新过期时间
+_SSE_ACQUIRE_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+if count > tonumber(ARGV[1]) then
+    redis.call('DECR', KEYS[1])
+    return 0
+end
+return 1
+"""
+
+# 归还名额：计数最低为 0（key 已过期时不会减成负数）
+_SSE_RELEASE_SCRIPT = """
+local count = tonumber(redis.call('GET', KEYS[1]) or '0')
+if count <= 1 then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+return redis.call('DECR', KEYS[1])
+"""
+
+
+def _acquire_sse_slot(user_id: str) -> bool:
+    """占用一个用户 SSE 连接名额。
+
+    Args:
+        user_id: 用户 ID
+
+    Returns:
+        是否成功占用（超过 SSE_MAX_CONNECTIONS_PER_USER 时返回 False）
+    """
+    limit = Config.SSE_MAX_CONNECTIONS_PER_USER
+    if limit <= 0:
+        return True
+
+    acquire = get_redis_connection().register_script(_SSE_ACQUIRE_SCRIPT)
+    return bool(acquire(keys=[f"sse:conn:{user_id}"], args=[limit, SSE_CONN_COUNTER_TTL]))
+
+
+def _release_sse_slot(user_id: str) -> None:
+    """归还用户 SSE 连接名额。"""
+    if Config.SSE_MAX_CONNECTIONS_PER_USER <= 0:
+        return
+    try:
+        release = get_redis_connection().register_script(_SSE_RELEASE_SCRIPT)
+        release(keys=[f"sse:conn:{user_id}"])
+    except Exception as e:
+        logger.warning(f"归还 SSE 连接名额失败: user_id={user_id}, error={e}")
+
+
 @api_bp.route('/generate/stream/<task_id>', methods=['GET'])
 @login_required
 def stream_image_task(task_id: str):
@@ -327,7 +423,8 @@ def stream_image_task(task_id: str):
     try:
         user = get_current_user()
         user_id = str(user.id)
-        task = TaskStore.get_task(TaskType.IMAGE, task_id)
+        # 任务元信息与图片状态一次 pipeline 读取，用于权限校验和补发已有状态
+        task, initial_state = ImageTaskStateStore.load_task_and_state(task_id)
 
         if not task:
             return jsonify({
@@ -345,8 +442,19 @@ def stream_image_task(task_id: str):
 
         task_status = str(task.get("status") or "").lower()
 
+        # 限制单个用户的并发连接数，避免大量挂起连接占用 Redis 订阅和 worker 线程
+        if not _acquire_sse_slot(user_id):
+            return jsonify({
+                "success": False,
+                "error": "连接数过多，请关闭其他页面后重试"
+            }), 429
+
         # 订阅 Redis Pub/Sub 频道
-        pubsub = TaskStore.subscribe_events(TaskType.IMAGE, task_id)
+        try:
+            pubsub = TaskStore.subscribe_events(TaskType.IMAGE, task_id)
+        except Exception:
+            _release_sse_slot(user_id)
+            raise
 
         def event_stream():
             try:
@@ -354,7 +462,7 @@ def stream_image_task(task_id: str):
 
                 def emit_event(event_type: str, event_data: Dict[str, Any]):
                     yield f"event: {event_type}\n"
-                    yield f"data: {json.dumps(event_data, ensure_ascii=False)}\n\n"
+                    yield f"data: {fast_json.dumps(event_data).decode('utf-8')}\n\n"
 
                 def sort_index(value: str) -> int:
                     try:
@@ -373,7 +481,7 @@ def stream_image_task(task_id: str):
                         finish_data = result_raw
                     elif isinstance(result_raw, str) and result_raw.strip():
                         try:
-                            parsed = json.loads(result_raw)
+                            parsed = fast_json.loads(result_raw)
                             if isinstance(parsed, dict):
                                 finish_data = parsed
                         except json.JSONDecodeError:
@@ -415,7 +523,7 @@ def stream_image_task(task_id: str):
                     return finish_data
 
                 def emit_initial_state():
-                    state = ImageTaskStateStore.load_state(task_id)
+                    state = initial_state
                     if not state:
                         return
 
@@ -496,17 +604,20 @@ def stream_image_task(task_id: str):
                 if initial_finished["value"]:
                     return
 
-                # 再监听新的事件
-                for message in pubsub.listen():
-                    if message.get("type") != "message":
+                # 再监听新的事件（空闲时定期发送注释行心跳，及时发现已断开的连接）
+                keepalive_interval = Config.SSE_KEEPALIVE_INTERVAL
+                last_sent = time.monotonic()
+                while True:
+                    message = pubsub.get_message(timeout=keepalive_interval)
+                    if message is None or message.get("type") != "message":
+                        if time.monotonic() - last_sent >= keepalive_interval:
+                            yield ": keepalive\n\n"
+                            last_sent = time.monotonic()
                         continue
 
-                    data = message.get("data")
-                    if isinstance(data, bytes):
-                        data = data.decode("utf-8")
-
+                    # fast_json 可直接解析 bytes，无需先解码
                     try:
-                        payload = json.loads(data)
+                        payload = fast_json.loads(message.get("data"))
                     except json.JSONDecodeError:
                         continue
 
@@ -515,14 +626,16 @@ def stream_image_task(task_id: str):
 
                     for chunk in emit_event(event_type, event_data):
                         yield chunk
+                    last_sent = time.monotonic()
 
                     # finish 事件后结束流
                     if event_type == "finish":
                         break
             finally:
+                pubsub.unsubscribe()
                 pubsub.close()
 
-        return Response(
+        response = Response(
             event_stream(),
             mimetype='text/event-stream',
             headers={
@@ -531,6 +644,14 @@ def stream_image_task(task_id: str):
             }
         )
 
+        def on_close():
+            # 生成器未开始执行时其 finally 不会运行，这里兜底关闭订阅并归还连接名额
+            pubsub.close()
+            _release_sse_slot(user_id)
+
+        response.call_on_close(on_close)
+        return response
+
     except Exception as e:
         logger.exception(f"订阅图片任务事件失败: task_id={task_id}")
         return jsonify({
@@ -539,6 +660,61 @@ def stream_image_task(task_id: str):
         }), 500
 
 
+# 图片访问 URL 前缀
+IMAGE_URL_PREFIX = "/api/images/"
+
+
+def _summarize_page_image(
+    index: Any,
+    generated: Dict[str, Any],
+    failed: Dict[str, Any],
+    candidates_map: Dict[str, Any],
+) -> Dict[str, Any]:
+    """汇总单页图片的生成状态。
+
+    Args:
+        index: 页面索引
+        generated: 已生成图片映射（索引字符串 -> 文件名）
+        failed: 失败信息映射（索引字符串 -> 错误信息）
+        candidates_map: 候选图片映射（索引字符串 -> 文件名列表）
+
+    Returns:
+        页面状态字典（done / error / pending）
+    """
+    key = str(index)
+
+    filename = generated.get(key)
+    if filename is not None:
+        candidate_files = candidates_map.get(key) or [filename]
+        return {
+            "index": index,
+            "status": "done",
+            "image_url": IMAGE_URL_PREFIX + filename,
+            "candidates": [IMAGE_URL_PREFIX + f for f in candidate_files],
+        }
+
+    if key in failed:
+        # 兼容两种格式：字符串（旧）和字典（新）
+        failed_info = failed[key]
+        if isinstance(failed_info, dict):
+            error_message = failed_info.get("message") or "图片生成失败"
+            retryable = failed_info.get("retryable", True)
+        else:
+            error_message = failed_info or "图片生成失败"
+            retryable = True  # 旧格式默认可重试
+        return {
+            "index": index,
+            "status": "error",
+            "error": error_message,
+            "retryable": retryable,
+        }
+
+    return {
+        "index": index,
+        "status": "pending",
+    }
+
+
 @api_bp.route('/generate/<task_id>', methods=['GET'])
 @login_required
 def get_image_task_status(task_id: str):
@@ -561,7 +737,8 @@ def get_image_task_status(task_id: str):
     try:
         user = get_current_user()
         user_id = str(user.id)
-        task = TaskStore.get_task(TaskType.IMAGE, task_id)
+        # 任务元信息与图片状态一次 pipeline 读取（一次 Redis 往返）
+        task, state = ImageTaskStateStore.load_task_and_state(task_id)
 
         if not task:
             return jsonify({
@@ -586,49 +763,17 @@ def get_image_task_status(task_id: str):
         }
 
         # 汇总每页图片生成状态
-        state = ImageTaskStateStore.load_state(task_id)
         if state:
             pages = state.get("pages") or []
             generated = state.get("generated") or {}
             failed = state.get("failed") or {}
             candidates_map = state.get("candidates") or {}
 
-            images_summary = []
-            for page in pages:
-                index = page.get("index")
-                if index is None:
-                    continue
-                key = str(index)
-
-                if key in generated:
-                    filename = generated[key]
-                    candidate_files = candidates_map.get(key) or [filename]
-                    images_summary.append({
-                        "index": index,
-                        "status": "done",
-                        "image_url": f"/api/images/{filename}",
-                        "candidates": [f"/api/images/{f}" for f in candidate_files],
-                    })
-                elif key in failed:
-                    # 兼容两种格式：字符串（旧）和字典（新）
-                    failed_info = failed[key]
-                    if isinstance(failed_info, dict):
-                        error_message = failed_info.get("message") or "图片生成失败"
-                        retryable = failed_info.get("retryable", True)
-                    else:
-                        error_message = failed_info or "图片生成失败"
-                        retryable = True  # 旧格式默认可重试
-                    images_summary.append({
-                        "index": index,
-                        "status": "error",
-                        "error": error_message,
-                        "retryable": retryable,
-                    })
-                else:
-                    images_summary.append({
-                        "index": index,
-                        "status": "pending",
-                    })
+            images_summary = [
+                _summarize_page_image(index, generated, failed, candidates_map)
+                for index in (page.get("index") for page in pages)
+                if index is not None
+            ]
 
             response["images"] = images_summary
 
@@ -718,7 +863,7 @@ def retry_failed_images():
                 event_data = event["data"]
 
                 yield f"event: {event_type}\n"
-                yield f"data: {json.dumps(event_data, ensure_ascii=False)}\n\n"
+                yield f"data: {fast_json.dumps(event_data).decode('utf-8')}\n\n"
 
         return Response(
             generate(),
@@ -0,0 +1,103 @@
+"""
+审计日志服务
+
+审计日志写入不阻塞请求：请求线程只负责入队，后台线程批量插入数据库
+"""
+import atexit
+import logging
+import queue
+import threading
+from typing import Dict, List
+
+import sqlalchemy as sa
+
+from backend.db import db_session
+from backend.models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    """审计日志批量写入器
+
+    后台守护线程阻塞等待队列中的日志，取到后一次性取走队列中已积压的日志
+    （最多 BATCH_SIZE 条），用一条批量 INSERT 写入并提交。
+    进程退出时通过 atexit 写入剩余日志。
+    """
+
+    # 每次批量写入的最大条数
+    BATCH_SIZE = 500
+
+    def __init__(self):
+        """初始化队列并启动后台写入线程"""
+        self._queue: "queue.Queue[Dict]" = queue.Queue()
+        # 串行化后台线程与 atexit 的写入
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="audit-log-writer",
+            daemon=True,
+        )
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, entry: Dict) -> None:
+        """
+        提交一条审计日志（非阻塞）
+
+        Args:
+            entry: AuditLog 列名到值的字典，所有条目需包含相同的键
+        """
+        self._queue.put_nowait(entry)
+
+    def flush(self) -> None:
+        """同步写入队列中所有未写入的日志"""
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            self._write(batch)
+
+    def _drain(self, first: Dict = None) -> List[Dict]:
+        """取出队列中已积压的日志（不等待），最多 BATCH_SIZE 条"""
+        batch = [first] if first is not None else []
+        while len(batch) < self.BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        """后台线程主循环"""
+        while True:
+            first = self._queue.get()
+            self._write(self._drain(first))
+
+    def _write(self, batch: List[Dict]) -> None:
+        """批量插入一组日志，失败时记录错误并丢弃该批次"""
+        with self._write_lock:
+            try:
+                with db_session() as db:
+                    db.execute(sa.insert(AuditLog), batch)
+            except Exception as e:
+                logger.error(f"写入审计日志失败（{len(batch)} 条）: {e}", exc_info=True)
+
+
+# 单例模式
+_writer_instance = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_log_writer() -> AuditLogWriter:
+    """获取 AuditLogWriter 单例（首次调用时启动后台线程）
+
+    Returns:
+        AuditLogWriter: 写入器实例
+    """
+    global _writer_instance
+    if _writer_instance is None:
+        with _writer_lock:
+            if _writer_instance is None:
+                _writer_instance = AuditLogWriter()
+    return _writer_instance
@@ -13,6 +13,7 @@ from backend.generators.factory import ImageGeneratorFactory
 from backend.generators.image_api import SensitiveWordsError
 from backend.utils.image_compressor import compress_image
 from backend.task_queue import get_redis_connection
+from backend.task_queue.task_store import TaskStore, TaskType
 
 logger = logging.getLogger(__name__)
 
@@ -105,7 +106,28 @@ class ImageTaskStateStore:
             任务状态字典，不存在则返回 None
         """
         redis_conn = get_redis_connection()
-        raw = redis_conn.get(cls._make_key(task_id))
+        return cls._parse_state(task_id, redis_conn.get(cls._make_key(task_id)))
+
+    @classmethod
+    def load_task_and_state(
+        cls,
+        task_id: str,
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """通过一次 Redis pipeline 同时读取 TaskStore 元信息与图片任务状态。
+
+        Returns:
+            (任务元信息, 任务状态)，不存在的部分为 None
+        """
+        redis_conn = get_redis_connection()
+        pipe = redis_conn.pipeline(transaction=False)
+        pipe.hgetall(TaskStore._make_key(TaskType.IMAGE, task_id))
+        pipe.get(cls._make_key(task_id))
+        raw_task, raw_state = pipe.execute()
+        return TaskStore._parse_task(task_id, raw_task), cls._parse_state(task_id, raw_state)
+
+    @classmethod
+    def _parse_state(cls, task_id: str, raw: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        """解析 Redis 中存储的状态 JSON，并补全默认字段。"""
         if not raw:
             return None
 
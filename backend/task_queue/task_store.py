@@ -278,8 +278,23 @@ class TaskStore:
         """
         redis_conn = get_redis_connection()
         key = cls._make_key(task_type, task_id)
-        raw_data = redis_conn.hgetall(key)
+        return cls._parse_task(task_id, redis_conn.hgetall(key))
 
+    @classmethod
+    def _parse_task(
+        cls,
+        task_id: str,
+        raw_data: Dict[bytes, bytes],
+    ) -> Optional[Dict[str, Any]]:
+        """将 HGETALL 的结果解析为任务状态字典。
+
+        Args:
+            task_id: 任务 ID
+            raw_data: Redis 返回的原始 Hash 数据
+
+        Returns:
+            任务状态字典，数据为空则返回 None
+        """
         if not raw_data:
             return None
 
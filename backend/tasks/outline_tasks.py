@@ -9,7 +9,9 @@ from __future__ import annotations
 import base64
 import json
 import logging
+import shutil
 import traceback
+from pathlib import Path
 from typing import List, Optional
 
 from backend.task_queue.task_store import TaskStore, TaskStatus, TaskType
@@ -52,10 +54,35 @@ def _decode_images_from_base64(images_base64: Optional[List[str]]) -> Optional[L
     return decoded_images if decoded_images else None
 
 
+def _read_uploaded_images(image_paths: Optional[List[str]]) -> Optional[List[bytes]]:
+    """读取 API 进程保存的参考图片文件。
+
+    文件及其所在目录由 generate_outline_task 在任务结束时统一删除。
+
+    Args:
+        image_paths: 图片文件路径列表
+
+    Returns:
+        图片字节数据列表，没有可读取的图片时返回 None
+    """
+    if not image_paths:
+        return None
+
+    images: List[bytes] = []
+    for idx, image_path in enumerate(image_paths):
+        try:
+            images.append(Path(image_path).read_bytes())
+        except OSError as e:
+            logger.warning(f"图片 {idx} 读取失败: {e}")
+
+    return images if images else None
+
+
 def generate_outline_task(
     task_id: str,
     topic: str,
     images_base64: Optional[List[str]] = None,
+    image_paths: Optional[List[str]] = None,
 ) -> None:
     """RQ 异步任务：生成大纲。
 
@@ -65,7 +92,8 @@ def generate_outline_task(
     Args:
         task_id: 任务 ID，需提前在 TaskStore 中创建
         topic: 用户输入的主题
-        images_base64: 可选的参考图片（base64 编码）
+        images_base64: 可选的参考图片（base64 编码，JSON 请求）
+        image_paths: 可选的参考图片文件路径（multipart 上传，读取后删除）
 
     Side Effects:
         - 更新 TaskStore 中的任务状态
@@ -74,54 +102,69 @@ def generate_outline_task(
     """
     task_type = TaskType.OUTLINE
 
-    logger.info(f"[大纲任务] 开始执行: task_id={task_id}, topic={topic[:50]}...")
+    try:
+        logger.info(f"[大纲任务] 开始执行: task_id={task_id}, topic={topic[:50]}...")
+
+        # 参数校验
+        if not topic or not topic.strip():
+            logger.error(f"[大纲任务] 参数错误: topic 为空")
+            TaskStore.update_task_status(
+                task_type=task_type,
+                task_id=task_id,
+                status=TaskStatus.FAILED,
+                error="主题不能为空",
+            )
+            return
 
-    # 参数校验
-    if not topic or not topic.strip():
-        logger.error(f"[大纲任务] 参数错误: topic 为空")
+        # 标记任务开始执行
         TaskStore.update_task_status(
             task_type=task_type,
             task_id=task_id,
-            status=TaskStatus.FAILED,
-            error="主题不能为空",
+            status=TaskStatus.RUNNING,
+            progress_current=0,
+            progress_total=1,
         )
-        return
 
-    # 标记任务开始执行
-    TaskStore.update_task_status(
-        task_type=task_type,
-        task_id=task_id,
-        status=TaskStatus.RUNNING,
-        progress_current=0,
-        progress_total=1,
-    )
+        try:
+            # 读取/解码参考图片
+            images_bytes = _read_uploaded_images(image_paths) or _decode_images_from_base64(images_base64)
+            image_count = len(images_bytes) if images_bytes else 0
+            logger.info(f"[大纲任务] 参考图片数量: {image_count}")
+
+            # 调用大纲生成服务
+            outline_service = get_outline_service()
+            result = outline_service.generate_outline(
+                topic=topic.strip(),
+                images=images_bytes,
+            )
 
-    try:
-        # 解码参考图片
-        images_bytes = _decode_images_from_base64(images_base64)
-        image_count = len(images_bytes) if images_bytes else 0
-        logger.info(f"[大纲任务] 参考图片数量: {image_count}")
-
-        # 调用大纲生成服务
-        outline_service = get_outline_service()
-        result = outline_service.generate_outline(
-            topic=topic.strip(),
-            images=images_bytes,
-        )
+            # 处理结果
+            if result.get("success"):
+                logger.info(f"[大纲任务] 生成成功: task_id={task_id}")
+                TaskStore.update_task_status(
+                    task_type=task_type,
+                    task_id=task_id,
+                    status=TaskStatus.FINISHED,
+                    progress_current=1,
+                    result=result,  # TaskStore 会自动 JSON 序列化
+                )
+            else:
+                error_msg = result.get("error") or "大纲生成失败，请重试"
+                logger.warning(f"[大纲任务] 生成失败: task_id={task_id}, error={error_msg}")
+                TaskStore.update_task_status(
+                    task_type=task_type,
+                    task_id=task_id,
+                    status=TaskStatus.FAILED,
+                    error=error_msg,
+                )
 
-        # 处理结果
-        if result.get("success"):
-            logger.info(f"[大纲任务] 生成成功: task_id={task_id}")
-            TaskStore.update_task_status(
-                task_type=task_type,
-                task_id=task_id,
-                status=TaskStatus.FINISHED,
-                progress_current=1,
-                result=result,  # TaskStore 会自动 JSON 序列化
+        except Exception as e:
+            # 捕获所有未处理异常
+            error_msg = f"大纲生成异常: {str(e)}"
+            logger.error(
+                f"[大纲任务] 执行异常: task_id={task_id}\n"
+                f"{traceback.format_exc()}"
             )
-        else:
-            error_msg = result.get("error") or "大纲生成失败，请重试"
-            logger.warning(f"[大纲任务] 生成失败: task_id={task_id}, error={error_msg}")
             TaskStore.update_task_status(
                 task_type=task_type,
                 task_id=task_id,
@@ -129,19 +172,10 @@ def generate_outline_task(
                 error=error_msg,
             )
 
-    except Exception as e:
-        # 捕获所有未处理异常
-        error_msg = f"大纲生成异常: {str(e)}"
-        logger.error(
-            f"[大纲任务] 执行异常: task_id={task_id}\n"
-            f"{traceback.format_exc()}"
-        )
-        TaskStore.update_task_status(
-            task_type=task_type,
-            task_id=task_id,
-            status=TaskStatus.FAILED,
-            error=error_msg,
-        )
+    finally:
+        # 无论任务成功、失败还是提前返回，都删除 API 进程保存的上传目录
+        if image_paths:
+            shutil.rmtree(Path(image_paths[0]).parent, ignore_errors=True)
 
 
 __all__ = ["generate_outline_task"]
@@ -0,0 +1,64 @@
+"""JSON 编解码工具（优先使用 orjson，不可用时回退到标准库）"""
+import json
+from datetime import date
+from decimal import Decimal
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    解析 JSON，直接接受 bytes 以避免额外的解码拷贝
+
+    Args:
+        data: JSON 文本（bytes 或 str）
+
+    Returns:
+        解析后的 Python 对象
+
+    Raises:
+        json.JSONDecodeError: JSON 格式不正确（orjson 的异常同为其子类）
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _default(obj: Any) -> Any:
+    """
+    JSON 原生不支持的类型扩展
+
+    - datetime/date：输出为 ISO 8601 字符串（标准库回退时使用，orjson 原生支持）
+    - Decimal：与 Flask 默认实现一致输出为字符串（如 MySQL 的 SUM 结果）
+    """
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    序列化为 UTF-8 编码的 JSON bytes
+
+    datetime/date 会直接输出为 ISO 8601 字符串，调用方无需预先 isoformat()
+
+    Args:
+        obj: 待序列化的对象
+
+    Returns:
+        JSON bytes（非 ASCII 字符不转义）
+    """
+    if orjson is not None:
+        # OPT_NON_STR_KEYS：与标准库一致，允许 int 等非字符串字典键
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
@@ -0,0 +1,41 @@
+"""YAML 编解码工具（优先使用 libyaml C 扩展，不可用时回退到纯 Python 实现）"""
+from typing import Any, IO, Union
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as _SafeDumper
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # PyYAML 未编译 libyaml 扩展
+    from yaml import SafeDumper as _SafeDumper
+    from yaml import SafeLoader as _SafeLoader
+
+
+def safe_load(stream: Union[str, bytes, IO]) -> Any:
+    """
+    安全解析 YAML，行为与 yaml.safe_load 一致
+
+    Args:
+        stream: YAML 文本或文件对象
+
+    Returns:
+        解析后的 Python 对象
+
+    Raises:
+        yaml.YAMLError: YAML 格式不正确
+    """
+    return yaml.load(stream, Loader=_SafeLoader)
+
+
+def safe_dump(obj: Any, **kwargs) -> str:
+    """
+    安全序列化为 YAML 文本，行为与 yaml.safe_dump 一致
+
+    Args:
+        obj: 待序列化的对象
+        **kwargs: 透传给 yaml.dump 的参数（如 allow_unicode）
+
+    Returns:
+        YAML 文本
+    """
+    return yaml.dump(obj, Dumper=_SafeDumper, **kwargs)